@@ -1,14 +1,84 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.utils.functional import cached_property
 
 from .models import (
     ProcessedSubscriptionOrder,
+    SubscriptionCreditBalance,
     SubscriptionCreditLedger,
+    SubscriptionCreditLedgerArchive,
+    SubscriptionEvent,
+    SubscriptionInboxMessage,
     SubscriptionPlan,
     SubscriptionProduct,
-    SubscriptionStatus,
     UserSubscription,
 )
-from .services import grant_featured_credits
+from .services import expire_subscriptions, grant_featured_credits_bulk
+
+
+class EstimatedCountPaginator(Paginator):
+    """Use the planner's row estimate for unfiltered changelists over large tables.
+
+    Filtered querysets, small tables and backends without a cheap estimate fall back to
+    an exact ``COUNT(*)``.
+    """
+
+    exact_count_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is not None and not query.where:
+            estimate = self._estimated_rows()
+            if estimate is not None and estimate > self.exact_count_threshold:
+                return estimate
+        return super().count
+
+    def _estimated_rows(self):
+        model = self.object_list.model
+        connection = connections[self.object_list.db]
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            elif connection.vendor == "mysql":
+                cursor.execute(
+                    "SELECT table_rows FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s",
+                    [table],
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+
+
+class LedgerReasonFilter(admin.SimpleListFilter):
+    """Offer the reasons this app writes instead of a ``SELECT DISTINCT`` over the whole ledger."""
+
+    title = "reason"
+    parameter_name = "reason"
+
+    def lookups(self, request, model_admin):
+        return [
+            ("activation_grant", "Activation grant"),
+            ("monthly_grant", "Monthly grant"),
+            ("admin_grant", "Admin grant"),
+            ("consume", "Consume"),
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(reason=self.value())
+        return queryset
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(SubscriptionPlan)
@@ -37,34 +107,49 @@ class SubscriptionProductAdmin(admin.ModelAdmin):
 
 @admin.action(description="Mark selected subscriptions as expired")
 def expire_selected(modeladmin, request, queryset):
-    queryset.update(status=SubscriptionStatus.EXPIRED)
+    expire_subscriptions(queryset)
 
 
 @admin.action(description="Grant plan featured credits to selected subscriptions")
 def grant_plan_credits(modeladmin, request, queryset):
-    for subscription in queryset.select_related("plan"):
-        grant_featured_credits(subscription, reason="admin_grant")
+    grant_featured_credits_bulk(queryset, reason="admin_grant")
 
 
 @admin.register(UserSubscription)
-class UserSubscriptionAdmin(admin.ModelAdmin):
+class UserSubscriptionAdmin(LargeTableAdmin):
     list_display = (
         "user",
         "plan",
         "status",
         "current_period_end",
+        "featured_balance",
         "last_paid_order_reference",
     )
     list_filter = ("status", "plan")
-    search_fields = ("user__username", "last_paid_order_reference")
+    list_select_related = ("user", "plan")
+    # Exact and prefix lookups only, so each search term can use an index.
+    search_fields = ("user__username__startswith", "last_paid_order_reference__exact")
     actions = (expire_selected, grant_plan_credits)
     ordering = ("-current_period_end",)
 
+    def get_queryset(self, request):
+        balances = SubscriptionCreditBalance.objects.filter(
+            subscription=OuterRef("pk"), credit_type=SubscriptionCreditLedger.CreditType.FEATURED
+        )
+        return super().get_queryset(request).annotate(
+            featured_balance=Subquery(balances.values("balance")[:1])
+        )
+
+    @admin.display(description="Featured credits", ordering="featured_balance")
+    def featured_balance(self, obj):
+        return obj.featured_balance or 0
+
 
 @admin.register(SubscriptionCreditLedger)
-class SubscriptionCreditLedgerAdmin(admin.ModelAdmin):
+class SubscriptionCreditLedgerAdmin(LargeTableAdmin):
     list_display = ("user", "subscription", "credit_type", "change", "reason", "created_at")
-    list_filter = ("credit_type", "reason")
+    list_filter = ("credit_type", LedgerReasonFilter)
+    list_select_related = ("user", "subscription__user", "subscription__plan")
     readonly_fields = (
         "user",
         "subscription",
@@ -75,7 +160,34 @@ class SubscriptionCreditLedgerAdmin(admin.ModelAdmin):
         "related_listing_id",
         "created_at",
     )
-    search_fields = ("user__username", "reason", "related_order_reference")
+    search_fields = ("user__username__startswith", "related_order_reference__exact")
+    ordering = ("-created_at",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SubscriptionCreditLedgerArchive)
+class SubscriptionCreditLedgerArchiveAdmin(LargeTableAdmin):
+    list_display = ("user", "subscription", "credit_type", "change", "reason", "created_at", "archived_at")
+    list_filter = ("credit_type", LedgerReasonFilter)
+    list_select_related = ("user", "subscription__user", "subscription__plan")
+    readonly_fields = (
+        "user",
+        "subscription",
+        "credit_type",
+        "change",
+        "reason",
+        "related_order_reference",
+        "related_listing_id",
+        "grant_period",
+        "created_at",
+        "archived_at",
+    )
+    search_fields = ("user__username__startswith", "related_order_reference__exact")
     ordering = ("-created_at",)
 
     def has_add_permission(self, request):
@@ -86,9 +198,10 @@ class SubscriptionCreditLedgerAdmin(admin.ModelAdmin):
 
 
 @admin.register(ProcessedSubscriptionOrder)
-class ProcessedSubscriptionOrderAdmin(admin.ModelAdmin):
+class ProcessedSubscriptionOrderAdmin(LargeTableAdmin):
     list_display = ("order_reference", "user", "plan", "processed_at")
-    search_fields = ("order_reference", "user__username")
+    list_select_related = ("user", "plan")
+    search_fields = ("order_reference__exact", "user__username__startswith")
     readonly_fields = ("order_reference", "user", "plan", "processed_at")
 
     def has_add_permission(self, request):
@@ -96,3 +209,49 @@ class ProcessedSubscriptionOrderAdmin(admin.ModelAdmin):
 
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.action(description="Retry selected inbox messages now")
+def retry_inbox_messages(modeladmin, request, queryset):
+    queryset.exclude(status=SubscriptionInboxMessage.Status.DONE).update(
+        status=SubscriptionInboxMessage.Status.PENDING, available_at=timezone.now()
+    )
+
+
+@admin.register(SubscriptionInboxMessage)
+class SubscriptionInboxMessageAdmin(LargeTableAdmin):
+    list_display = ("order_reference", "user", "status", "attempts", "available_at", "created_at")
+    list_filter = ("status",)
+    list_select_related = ("user",)
+    search_fields = ("order_reference__exact", "user__username__startswith")
+    readonly_fields = (
+        "order_reference",
+        "user",
+        "skus",
+        "status",
+        "attempts",
+        "available_at",
+        "last_error",
+        "created_at",
+        "processed_at",
+    )
+    actions = (retry_inbox_messages,)
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(SubscriptionEvent)
+class SubscriptionEventAdmin(LargeTableAdmin):
+    list_display = ("id", "event_type", "user", "subscription", "created_at")
+    list_filter = ("event_type",)
+    list_select_related = ("user", "subscription__user", "subscription__plan")
+    search_fields = ("user__username__startswith",)
+    readonly_fields = ("event_type", "user", "subscription", "payload", "created_at")
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
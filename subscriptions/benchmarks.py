@@ -0,0 +1,330 @@
+"""
+Benchmark the subscriptions hot paths at different data sizes.
+
+Usage:
+    python -m subscriptions.benchmarks --sizes 100,1000,10000 --iterations 50
+    python -m subscriptions.benchmarks --json results.json
+
+Runs against a throwaway test database created from ``DJANGO_SETTINGS_MODULE``
+(default: ``subscriptions.tests.settings``), so it never touches real data.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+
+def _percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class _Item:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class _Order:
+    def __init__(self, reference):
+        self.reference = reference
+
+
+def _reset():
+    from django.contrib.auth import get_user_model
+
+    from .models import (
+        ProcessedSubscriptionOrder,
+        SubscriptionCreditBalance,
+        SubscriptionCreditCheckpoint,
+        SubscriptionCreditLedger,
+        SubscriptionCreditLedgerArchive,
+        SubscriptionPlan,
+        SubscriptionProduct,
+        UserSubscription,
+    )
+
+    for model in (
+        SubscriptionCreditLedger,
+        SubscriptionCreditLedgerArchive,
+        SubscriptionCreditCheckpoint,
+        SubscriptionCreditBalance,
+        ProcessedSubscriptionOrder,
+        UserSubscription,
+        SubscriptionProduct,
+        SubscriptionPlan,
+    ):
+        model.objects.all().delete()
+    get_user_model().objects.filter(username__startswith="bench-").delete()
+
+
+def seed(size: int, ledger_rows: int, rng: random.Random):
+    """Create ``size`` subscribed users with ``ledger_rows`` ledger entries each."""
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from .models import (
+        SubscriptionCreditLedger,
+        SubscriptionPlan,
+        SubscriptionProduct,
+        SubscriptionStatus,
+        UserSubscription,
+    )
+    from .services import rebuild_credit_balances
+
+    _reset()
+    User = get_user_model()
+    now = timezone.now()
+    plan = SubscriptionPlan.objects.create(
+        key="bench_plan",
+        name="Benchmark Plan",
+        price_ttd=Decimal("199.00"),
+        billing_period="monthly",
+        featured_credits_per_period=5,
+        max_active_listings=50,
+        badge_label="Bench",
+    )
+    product = SubscriptionProduct.objects.create(sku="BENCH_SUB_MONTH", plan=plan, period_days=30)
+
+    User.objects.bulk_create(
+        [User(username=f"bench-{index}") for index in range(size)], batch_size=1000
+    )
+    users = list(User.objects.filter(username__startswith="bench-").order_by("pk"))
+    UserSubscription.objects.bulk_create(
+        [
+            UserSubscription(
+                user=user,
+                plan=plan,
+                status=SubscriptionStatus.ACTIVE,
+                started_at=now - timedelta(days=rng.randint(0, 365)),
+                current_period_start=now - timedelta(days=1),
+                current_period_end=now + timedelta(days=29),
+            )
+            for user in users
+        ],
+        batch_size=1000,
+    )
+    subscriptions = list(UserSubscription.objects.filter(plan=plan))
+    entries = []
+    for subscription in subscriptions:
+        entries.append(
+            SubscriptionCreditLedger(
+                user_id=subscription.user_id,
+                subscription=subscription,
+                credit_type=SubscriptionCreditLedger.CreditType.FEATURED,
+                change=10_000,
+                reason="bench_seed",
+            )
+        )
+        for _ in range(max(0, ledger_rows - 1)):
+            entries.append(
+                SubscriptionCreditLedger(
+                    user_id=subscription.user_id,
+                    subscription=subscription,
+                    credit_type=SubscriptionCreditLedger.CreditType.FEATURED,
+                    change=-1,
+                    reason="bench_consume",
+                )
+            )
+        if len(entries) >= 5000:
+            SubscriptionCreditLedger.objects.bulk_create(entries)
+            entries = []
+    SubscriptionCreditLedger.objects.bulk_create(entries)
+    rebuild_credit_balances()
+    return users, subscriptions, product
+
+
+def _measure(name: str, size: int, iterations: int, call, setup=None) -> dict:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings, queries = [], []
+    for index in range(iterations):
+        argument = setup(index) if setup else None
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            call(argument)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+    return {
+        "benchmark": name,
+        "size": size,
+        "iterations": iterations,
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": _percentile(timings, 0.50),
+        "p95_ms": _percentile(timings, 0.95),
+        "p99_ms": _percentile(timings, 0.99),
+        "max_ms": max(timings),
+        "queries_mean": statistics.fmean(queries),
+        "queries_max": max(queries),
+    }
+
+
+def run_benchmarks(
+    sizes, *, iterations: int = 50, ledger_rows: int = 10, batch_iterations: int = 5, seed_value: int = 0
+):
+    """Seed each size in turn and time every hot path; returns a list of result rows."""
+    from django.utils import timezone
+
+    from .entitlements import can_post_listing, consume_featured_credit, get_entitlements
+    from .models import SubscriptionCreditLedger, SubscriptionStatus, UserSubscription
+    from .services import (
+        activate_or_renew_subscription_from_order_item,
+        expire_due_subscriptions,
+        grant_periodic_credits,
+    )
+
+    rng = random.Random(seed_value)
+    results = []
+    for size in sizes:
+        users, subscriptions, product = seed(size, ledger_rows, rng)
+        pick = lambda index: rng.choice(users)  # noqa: E731
+
+        results.append(_measure("get_entitlements", size, iterations, get_entitlements, pick))
+        results.append(_measure("can_post_listing", size, iterations, can_post_listing, pick))
+        results.append(
+            _measure(
+                "consume_featured_credit",
+                size,
+                iterations,
+                lambda user: consume_featured_credit(user, listing_id=uuid.uuid4(), reason="bench"),
+                pick,
+            )
+        )
+        results.append(
+            _measure(
+                "activate_or_renew_subscription_from_order_item",
+                size,
+                iterations,
+                lambda user: activate_or_renew_subscription_from_order_item(
+                    _Order(f"BENCH-{uuid.uuid4()}"), None, _Item(product.sku), user
+                ),
+                pick,
+            )
+        )
+
+        overdue = max(1, size // 10)
+
+        def make_overdue(index):
+            now = timezone.now()
+            ids = [subscription.pk for subscription in rng.sample(subscriptions, min(overdue, len(subscriptions)))]
+            UserSubscription.objects.filter(pk__in=ids).update(
+                status=SubscriptionStatus.ACTIVE, current_period_end=now - timedelta(minutes=1)
+            )
+
+        def restore_periods():
+            UserSubscription.objects.filter(pk__in=[subscription.pk for subscription in subscriptions]).update(
+                status=SubscriptionStatus.ACTIVE, current_period_end=timezone.now() + timedelta(days=29)
+            )
+
+        results.append(
+            _measure(
+                "expire_due_subscriptions",
+                size,
+                batch_iterations,
+                lambda _: expire_due_subscriptions(),
+                make_overdue,
+            )
+        )
+        restore_periods()
+
+        def start_period_today(index):
+            SubscriptionCreditLedger.objects.filter(reason="monthly_grant").delete()
+            UserSubscription.objects.filter(pk__in=[subscription.pk for subscription in subscriptions]).update(
+                current_period_start=timezone.now()
+            )
+
+        results.append(
+            _measure(
+                "grant_periodic_credits",
+                size,
+                batch_iterations,
+                lambda _: grant_periodic_credits(),
+                start_period_today,
+            )
+        )
+    return results
+
+
+def _metadata() -> dict:
+    import django
+    from django.db import connection
+
+    try:
+        from importlib.metadata import version
+
+        package_version = version("mroudai-django-subscriptions")
+    except Exception:
+        package_version = None
+    return {
+        "package_version": package_version,
+        "django_version": django.get_version(),
+        "python_version": platform.python_version(),
+        "database_vendor": connection.vendor,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def _print_table(results, stream):
+    header = f"{'benchmark':<48} {'size':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}"
+    stream.write(header + "\n" + "-" * len(header) + "\n")
+    for row in results:
+        stream.write(
+            f"{row['benchmark']:<48} {row['size']:>8} {row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} "
+            f"{row['p99_ms']:>9.3f} {row['queries_mean']:>8.1f}\n"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the subscriptions hot paths.")
+    parser.add_argument("--sizes", default="100,1000", help="Comma-separated subscriber counts to seed.")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per per-user benchmark.")
+    parser.add_argument("--batch-iterations", type=int, default=5, help="Timed calls per table-wide job.")
+    parser.add_argument("--ledger-rows", type=int, default=10, help="Ledger entries seeded per subscription.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for reproducible runs.")
+    parser.add_argument(
+        "--json", dest="json_path", help="Write machine-readable results to this path ('-' for stdout)."
+    )
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "subscriptions.tests.settings")
+    import django
+
+    django.setup()
+    from django.db import connection
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        results = run_benchmarks(
+            sizes,
+            iterations=args.iterations,
+            ledger_rows=args.ledger_rows,
+            batch_iterations=args.batch_iterations,
+            seed_value=args.seed,
+        )
+        report = {"meta": _metadata(), "results": results}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.json_path == "-":
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    _print_table(results, sys.stdout)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
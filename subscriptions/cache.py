@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import threading
+import uuid
+
+from django.core.cache import caches
+from django.utils import timezone
+
+from .conf import entitlement_cache_alias, entitlement_cache_timeout
+
+KEY_PREFIX = "subscriptions:entitlements"
+GLOBAL_VERSION_KEY = f"{KEY_PREFIX}:version"
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _backend():
+    alias = entitlement_cache_alias()
+    return caches[alias] if alias else None
+
+
+def is_enabled() -> bool:
+    return bool(entitlement_cache_alias())
+
+
+def _entry_key(user_id) -> str:
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+def _version_key(user_id) -> str:
+    return f"{KEY_PREFIX}:{user_id}:version"
+
+
+def _new_version() -> str:
+    return uuid.uuid4().hex
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _ensure_version(cache, key: str, value):
+    if value is not None:
+        return value
+    cache.add(key, _new_version(), timeout=None)
+    return cache.get(key)
+
+
+async def _aensure_version(cache, key: str, value):
+    if value is not None:
+        return value
+    await cache.aadd(key, _new_version(), timeout=None)
+    return await cache.aget(key)
+
+
+def _match(entry, version):
+    if entry is not None and entry[0] == version:
+        _count("hits")
+        return entry[1], version
+    _count("misses")
+    return None, version
+
+
+def _timeout(valid_until) -> int:
+    timeout = entitlement_cache_timeout()
+    if valid_until is not None:
+        timeout = min(timeout, int((valid_until - timezone.now()).total_seconds()))
+    return timeout
+
+
+def lookup(user_id):
+    """Return ``(snapshot, version)`` for a user; ``snapshot`` is ``None`` on a miss.
+
+    ``version`` must be handed back to :func:`store` so an entry computed before a
+    concurrent write is never stored under the post-write version.
+    """
+    cache = _backend()
+    if cache is None or user_id is None:
+        return None, None
+
+    entry_key, version_key = _entry_key(user_id), _version_key(user_id)
+    found = cache.get_many([entry_key, version_key, GLOBAL_VERSION_KEY])
+    version = (
+        _ensure_version(cache, version_key, found.get(version_key)),
+        _ensure_version(cache, GLOBAL_VERSION_KEY, found.get(GLOBAL_VERSION_KEY)),
+    )
+    return _match(found.get(entry_key), version)
+
+
+async def alookup(user_id):
+    cache = _backend()
+    if cache is None or user_id is None:
+        return None, None
+
+    entry_key, version_key = _entry_key(user_id), _version_key(user_id)
+    found = await cache.aget_many([entry_key, version_key, GLOBAL_VERSION_KEY])
+    version = (
+        await _aensure_version(cache, version_key, found.get(version_key)),
+        await _aensure_version(cache, GLOBAL_VERSION_KEY, found.get(GLOBAL_VERSION_KEY)),
+    )
+    return _match(found.get(entry_key), version)
+
+
+def store(user_id, version, snapshot, valid_until=None) -> None:
+    cache = _backend()
+    if cache is None or user_id is None or version is None:
+        return
+    timeout = _timeout(valid_until)
+    if timeout > 0:
+        cache.set(_entry_key(user_id), (version, snapshot), timeout=timeout)
+
+
+async def astore(user_id, version, snapshot, valid_until=None) -> None:
+    cache = _backend()
+    if cache is None or user_id is None or version is None:
+        return
+    timeout = _timeout(valid_until)
+    if timeout > 0:
+        await cache.aset(_entry_key(user_id), (version, snapshot), timeout=timeout)
+
+
+def bump(user_ids) -> None:
+    cache = _backend()
+    if cache is None:
+        return
+    keys = {_version_key(user_id): _new_version() for user_id in user_ids if user_id is not None}
+    if keys:
+        cache.set_many(keys, timeout=None)
+
+
+def bump_all() -> None:
+    cache = _backend()
+    if cache is not None:
+        cache.set(GLOBAL_VERSION_KEY, _new_version(), timeout=None)
+
+
+def stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
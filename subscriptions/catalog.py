@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+
+from .conf import catalog_cache_alias
+from .models import SubscriptionPlan, SubscriptionProduct
+
+VERSION_KEY = "subscriptions:catalog:version"
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    products_by_sku: Mapping[str, SubscriptionProduct]
+    plans_by_key: Mapping[str, SubscriptionPlan]
+    version: str | None = None
+
+
+_snapshot: CatalogSnapshot | None = None
+_lock = threading.Lock()
+
+
+def _shared_cache():
+    alias = catalog_cache_alias()
+    return caches[alias] if alias else None
+
+
+def _shared_version() -> str | None:
+    cache = _shared_cache()
+    if cache is None:
+        return None
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def _ashared_version() -> str | None:
+    cache = _shared_cache()
+    if cache is None:
+        return None
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def load_catalog(version: str | None = None) -> CatalogSnapshot:
+    plans = {plan.pk: plan for plan in SubscriptionPlan.objects.all()}
+    products = {}
+    for product in SubscriptionProduct.objects.filter(is_active=True):
+        product.plan = plans[product.plan_id]
+        products[product.sku] = product
+    return CatalogSnapshot(
+        products_by_sku=MappingProxyType(products),
+        plans_by_key=MappingProxyType({plan.key: plan for plan in plans.values()}),
+        version=version,
+    )
+
+
+def get_catalog() -> CatalogSnapshot:
+    global _snapshot
+    version = _shared_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = load_catalog(version)
+        return _snapshot
+
+
+async def aget_catalog() -> CatalogSnapshot:
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == await _ashared_version():
+        return snapshot
+    return await sync_to_async(get_catalog)()
+
+
+def invalidate() -> None:
+    global _snapshot
+    _snapshot = None
+    cache = _shared_cache()
+    if cache is not None:
+        cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def sku_from_item(item):
+    if isinstance(item, dict):
+        return item.get("sku") or item.get("product_sku")
+    return getattr(item, "sku", None) or getattr(item, "product_sku", None)
+
+
+def get_product(sku: str) -> SubscriptionProduct | None:
+    return get_catalog().products_by_sku.get(sku) if sku else None
+
+
+def get_plan(key: str) -> SubscriptionPlan | None:
+    return get_catalog().plans_by_key.get(key)
@@ -10,6 +10,32 @@ DEFAULTS = {
     "SUBSCRIPTIONS_GRACE_DAYS_DEFAULT": 7,
     "SUBSCRIPTIONS_ENABLE_OVERRIDES": True,
     "SUBSCRIPTIONS_ENABLE_USAGE": True,
+    "SUBSCRIPTIONS_EXPIRE_ON_READ": False,
+    "SUBSCRIPTIONS_ENTITLEMENT_CACHE": None,
+    "SUBSCRIPTIONS_ENTITLEMENT_CACHE_TIMEOUT": 300,
+    "SUBSCRIPTIONS_CATALOG_CACHE": None,
+    "SUBSCRIPTIONS_ASYNC_ORDER_RECEIVER": False,
+    "SUBSCRIPTIONS_EXPIRY_BATCH_SIZE": 500,
+    "SUBSCRIPTIONS_GRANT_BATCH_SIZE": 1000,
+    "SUBSCRIPTIONS_ARCHIVE_BATCH_SIZE": 500,
+    "SUBSCRIPTIONS_PROCESSED_ORDER_LRU_SIZE": 10000,
+    "SUBSCRIPTIONS_PROCESSED_ORDER_CACHE": None,
+    "SUBSCRIPTIONS_PROCESSED_ORDER_CACHE_TIMEOUT": 86400,
+    "SUBSCRIPTIONS_METRICS_BACKEND": None,
+    "SUBSCRIPTIONS_ORDER_INBOX": False,
+    "SUBSCRIPTIONS_INBOX_BATCH_SIZE": 100,
+    "SUBSCRIPTIONS_INBOX_LEASE_SECONDS": 300,
+    "SUBSCRIPTIONS_INBOX_MAX_ATTEMPTS": 8,
+    "SUBSCRIPTIONS_INBOX_RETRY_BACKOFF": 30,
+    "SUBSCRIPTIONS_EVENT_BATCH_SIZE": 500,
+    "SUBSCRIPTIONS_EVENT_SETTLE_SECONDS": 10,
+    "SUBSCRIPTIONS_EVENT_GAP_RETENTION_SECONDS": 86400,
+    "SUBSCRIPTIONS_READ_DATABASE": None,
+    "SUBSCRIPTIONS_PRIMARY_PIN_SECONDS": 5,
+    "SUBSCRIPTIONS_PRIMARY_PIN_CACHE": None,
+    "SUBSCRIPTIONS_ENTITLEMENT_SNAPSHOTS": False,
+    "SUBSCRIPTIONS_USAGE_BUFFER_SIZE": 1000,
+    "SUBSCRIPTIONS_USAGE_FLUSH_SECONDS": 10,
 }
 
 
@@ -41,3 +67,107 @@ def overrides_enabled() -> bool:
 
 def usage_enabled() -> bool:
     return bool(get_setting("SUBSCRIPTIONS_ENABLE_USAGE"))
+
+
+def usage_buffer_size() -> int:
+    return int(get_setting("SUBSCRIPTIONS_USAGE_BUFFER_SIZE") or 0)
+
+
+def usage_flush_seconds() -> float:
+    return float(get_setting("SUBSCRIPTIONS_USAGE_FLUSH_SECONDS") or 0)
+
+
+def expire_on_read() -> bool:
+    return bool(get_setting("SUBSCRIPTIONS_EXPIRE_ON_READ"))
+
+
+def entitlement_cache_alias() -> str | None:
+    return get_setting("SUBSCRIPTIONS_ENTITLEMENT_CACHE")
+
+
+def entitlement_cache_timeout() -> int:
+    return int(get_setting("SUBSCRIPTIONS_ENTITLEMENT_CACHE_TIMEOUT") or 0)
+
+
+def entitlement_snapshots_enabled() -> bool:
+    return bool(get_setting("SUBSCRIPTIONS_ENTITLEMENT_SNAPSHOTS"))
+
+
+def catalog_cache_alias() -> str | None:
+    return get_setting("SUBSCRIPTIONS_CATALOG_CACHE")
+
+
+def async_order_receiver() -> bool:
+    return bool(get_setting("SUBSCRIPTIONS_ASYNC_ORDER_RECEIVER"))
+
+
+def expiry_batch_size() -> int:
+    return int(get_setting("SUBSCRIPTIONS_EXPIRY_BATCH_SIZE") or 500)
+
+
+def grant_batch_size() -> int:
+    return int(get_setting("SUBSCRIPTIONS_GRANT_BATCH_SIZE") or 1000)
+
+
+def archive_batch_size() -> int:
+    return int(get_setting("SUBSCRIPTIONS_ARCHIVE_BATCH_SIZE") or 500)
+
+
+def processed_order_lru_size() -> int:
+    return int(get_setting("SUBSCRIPTIONS_PROCESSED_ORDER_LRU_SIZE") or 0)
+
+
+def processed_order_cache_alias() -> str | None:
+    return get_setting("SUBSCRIPTIONS_PROCESSED_ORDER_CACHE")
+
+
+def processed_order_cache_timeout() -> int:
+    return int(get_setting("SUBSCRIPTIONS_PROCESSED_ORDER_CACHE_TIMEOUT") or 0)
+
+
+def metrics_backend_path() -> str | None:
+    return get_setting("SUBSCRIPTIONS_METRICS_BACKEND")
+
+
+def order_inbox_enabled() -> bool:
+    return bool(get_setting("SUBSCRIPTIONS_ORDER_INBOX"))
+
+
+def inbox_batch_size() -> int:
+    return int(get_setting("SUBSCRIPTIONS_INBOX_BATCH_SIZE") or 100)
+
+
+def inbox_lease_seconds() -> int:
+    return int(get_setting("SUBSCRIPTIONS_INBOX_LEASE_SECONDS") or 300)
+
+
+def inbox_max_attempts() -> int:
+    return int(get_setting("SUBSCRIPTIONS_INBOX_MAX_ATTEMPTS") or 1)
+
+
+def inbox_retry_backoff() -> int:
+    return int(get_setting("SUBSCRIPTIONS_INBOX_RETRY_BACKOFF") or 0)
+
+
+def event_batch_size() -> int:
+    return int(get_setting("SUBSCRIPTIONS_EVENT_BATCH_SIZE") or 500)
+
+
+def event_settle_seconds() -> int:
+    return int(get_setting("SUBSCRIPTIONS_EVENT_SETTLE_SECONDS") or 0)
+
+
+def event_gap_retention_seconds() -> int:
+    return int(get_setting("SUBSCRIPTIONS_EVENT_GAP_RETENTION_SECONDS") or 0)
+
+
+def read_database_alias() -> str | None:
+    return get_setting("SUBSCRIPTIONS_READ_DATABASE")
+
+
+def primary_pin_seconds() -> float:
+    return float(get_setting("SUBSCRIPTIONS_PRIMARY_PIN_SECONDS") or 0)
+
+
+def primary_pin_cache_alias() -> str | None:
+    return get_setting("SUBSCRIPTIONS_PRIMARY_PIN_CACHE") or entitlement_cache_alias()
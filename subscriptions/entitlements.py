@@ -1,59 +1,321 @@
 from __future__ import annotations
 
+from asgiref.sync import sync_to_async
 from django.utils import timezone
 
+from . import cache as entitlement_cache
+from . import memo
+from .conf import entitlement_snapshots_enabled, expire_on_read
+from .metrics import instrument, set_outcome
 from .models import SubscriptionStatus
+from .routers import primary_reads, replica_reads
 from .selectors import (
+    aget_active_subscription_for_user,
+    aget_entitlement_snapshot,
+    aget_featured_credit_balance,
+    aget_usage_count,
     get_active_subscription_for_user,
+    get_active_subscription_user_ids,
+    get_active_subscriptions_for_users,
+    get_entitlement_snapshot,
+    get_entitlement_snapshots,
     get_featured_credit_balance,
+    get_featured_credit_balances,
+    get_usage_count,
 )
 from .services import consume_featured_credit as _consume_credit
+from .services import consume_featured_credits as _consume_credits
 from .services import expire_due_subscriptions
+from .usage import ACTIVE_LISTINGS
 
 
+@instrument
 def get_active_subscription(user):
+    user_id = getattr(user, "pk", None)
+    cached = memo.get(user_id, "subscription")
+    if cached is not memo.MISSING:
+        return cached
+
+    now = timezone.now()
+    if expire_on_read():
+        expire_due_subscriptions(now=now)
+    with replica_reads([user_id]):
+        subscription = get_active_subscription_for_user(user, now=now)
+    return memo.remember(user_id, "subscription", subscription)
+
+
+@instrument
+async def aget_active_subscription(user):
+    user_id = getattr(user, "pk", None)
+    cached = memo.get(user_id, "subscription")
+    if cached is not memo.MISSING:
+        return cached
+
     now = timezone.now()
-    expire_due_subscriptions(now=now)
-    return get_active_subscription_for_user(user, now=now)
+    if expire_on_read():
+        await sync_to_async(expire_due_subscriptions)(now=now)
+    with replica_reads([user_id]):
+        subscription = await aget_active_subscription_for_user(user, now=now)
+    return memo.remember(user_id, "subscription", subscription)
 
 
+@instrument
 def has_active_subscription(user) -> bool:
+    if entitlement_cache.is_enabled() or entitlement_snapshots_enabled():
+        return _entitlement_snapshot(user)["active"]
     return get_active_subscription(user) is not None
 
 
-def get_entitlements(user) -> dict:
-    subscription = get_active_subscription(user)
+def _build_snapshot(subscription, balance: int) -> dict:
     if not subscription:
         return {
-            "max_active_listings": None,
-            "featured_credits_balance": 0,
-            "badge_label": "",
-            "priority_support": False,
+            "active": False,
+            "entitlements": {
+                "max_active_listings": None,
+                "featured_credits_balance": 0,
+                "badge_label": "",
+                "priority_support": False,
+            },
         }
 
     plan = subscription.plan
     return {
-        "max_active_listings": plan.max_active_listings,
-        "featured_credits_balance": get_featured_credit_balance(subscription),
-        "badge_label": plan.badge_label,
-        "priority_support": plan.priority_support,
+        "active": True,
+        "entitlements": {
+            "max_active_listings": plan.max_active_listings,
+            "featured_credits_balance": balance,
+            "badge_label": plan.badge_label,
+            "priority_support": plan.priority_support,
+        },
     }
 
 
-def can_post_listing(user):
-    subscription = get_active_subscription(user)
-    if not subscription:
+def _snapshot_from_row(row, now) -> tuple[dict, object]:
+    """Return ``(snapshot, valid_until)`` for a ``UserEntitlementSnapshot`` row."""
+    if row.subscription_id is None or row.valid_until is None or row.valid_until <= now:
+        return _build_snapshot(None, 0), None
+    snapshot = {
+        "active": True,
+        "entitlements": {
+            "max_active_listings": row.max_active_listings,
+            "featured_credits_balance": row.featured_credits_balance,
+            "badge_label": row.badge_label,
+            "priority_support": row.priority_support,
+        },
+    }
+    return snapshot, row.valid_until
+
+
+def _load_snapshot(user) -> tuple[dict, object]:
+    user_id = getattr(user, "pk", None)
+    if user_id is not None and entitlement_snapshots_enabled():
+        with replica_reads([user_id]):
+            row = get_entitlement_snapshot(user_id)
+        if row is not None:
+            return _snapshot_from_row(row, timezone.now())
+
+    subscription = get_active_subscription(user) if user is not None else None
+    with replica_reads([user_id]):
+        balance = get_featured_credit_balance(subscription) if subscription else 0
+    return _build_snapshot(subscription, balance), subscription.current_period_end if subscription else None
+
+
+async def _aload_snapshot(user) -> tuple[dict, object]:
+    user_id = getattr(user, "pk", None)
+    if user_id is not None and entitlement_snapshots_enabled():
+        with replica_reads([user_id]):
+            row = await aget_entitlement_snapshot(user_id)
+        if row is not None:
+            return _snapshot_from_row(row, timezone.now())
+
+    subscription = await aget_active_subscription(user) if user is not None else None
+    with replica_reads([user_id]):
+        balance = await aget_featured_credit_balance(subscription) if subscription else 0
+    return _build_snapshot(subscription, balance), subscription.current_period_end if subscription else None
+
+
+def _entitlement_snapshot(user) -> dict:
+    user_id = getattr(user, "pk", None)
+    cached = memo.get(user_id, "snapshot")
+    if cached is not memo.MISSING:
+        return cached
+
+    snapshot, version = entitlement_cache.lookup(user_id)
+    if snapshot is not None:
+        return memo.remember(user_id, "snapshot", snapshot)
+
+    snapshot, valid_until = _load_snapshot(user)
+    entitlement_cache.store(user_id, version, snapshot, valid_until=valid_until)
+    return memo.remember(user_id, "snapshot", snapshot)
+
+
+async def _aentitlement_snapshot(user) -> dict:
+    user_id = getattr(user, "pk", None)
+    cached = memo.get(user_id, "snapshot")
+    if cached is not memo.MISSING:
+        return cached
+
+    snapshot, version = await entitlement_cache.alookup(user_id)
+    if snapshot is not None:
+        return memo.remember(user_id, "snapshot", snapshot)
+
+    snapshot, valid_until = await _aload_snapshot(user)
+    await entitlement_cache.astore(user_id, version, snapshot, valid_until=valid_until)
+    return memo.remember(user_id, "snapshot", snapshot)
+
+
+@instrument
+def get_entitlements(user) -> dict:
+    return dict(_entitlement_snapshot(user)["entitlements"])
+
+
+@instrument
+async def aget_entitlements(user) -> dict:
+    return dict((await _aentitlement_snapshot(user))["entitlements"])
+
+
+def _user_ids(users_or_ids) -> list:
+    return list({getattr(user, "pk", user) for user in users_or_ids if user is not None})
+
+
+def _table_snapshots(user_ids) -> dict:
+    if not entitlement_snapshots_enabled():
+        return {}
+    with replica_reads(user_ids):
+        rows = get_entitlement_snapshots(user_ids)
+    now = timezone.now()
+    return {user_id: _snapshot_from_row(row, now)[0] for user_id, row in rows.items()}
+
+
+@instrument
+def has_active_subscription_bulk(users_or_ids) -> dict:
+    user_ids = _user_ids(users_or_ids)
+    if not user_ids:
+        return {}
+    snapshots = _table_snapshots(user_ids)
+    missing = [user_id for user_id in user_ids if user_id not in snapshots]
+    active = set()
+    if missing:
+        if expire_on_read():
+            expire_due_subscriptions()
+        with replica_reads(missing):
+            active = get_active_subscription_user_ids(missing)
+    return {
+        user_id: snapshots[user_id]["active"] if user_id in snapshots else user_id in active for user_id in user_ids
+    }
+
+
+@instrument
+def get_entitlements_bulk(users_or_ids) -> dict:
+    user_ids = _user_ids(users_or_ids)
+    if not user_ids:
+        return {}
+    snapshots = _table_snapshots(user_ids)
+    missing = [user_id for user_id in user_ids if user_id not in snapshots]
+    if missing:
+        if expire_on_read():
+            expire_due_subscriptions()
+        with replica_reads(missing):
+            subscriptions = get_active_subscriptions_for_users(missing)
+            balances = (
+                get_featured_credit_balances([subscription.pk for subscription in subscriptions.values()])
+                if subscriptions
+                else {}
+            )
+        for user_id in missing:
+            subscription = subscriptions.get(user_id)
+            balance = balances.get(subscription.pk, 0) if subscription else 0
+            snapshots[user_id] = _build_snapshot(subscription, balance)
+
+    entitlements = {}
+    for user_id in user_ids:
+        snapshot = memo.remember(user_id, "snapshot", snapshots[user_id])
+        entitlements[user_id] = dict(snapshot["entitlements"])
+    return entitlements
+
+
+def _listing_limit(snapshot: dict):
+    return snapshot["entitlements"]["max_active_listings"] if snapshot["active"] else None
+
+
+def _listing_decision(snapshot: dict, used: int = 0):
+    if not snapshot["active"]:
         return False, "no_active_subscription"
 
-    entitlements = get_entitlements(user)
-    max_active = entitlements["max_active_listings"]
+    max_active = snapshot["entitlements"]["max_active_listings"]
     if max_active is None:
         return True, "unlimited"
-    return True, "limit_not_enforced_in_mvp"
+    if used < max_active:
+        return True, "within_limit"
+    return False, "listing_limit_reached"
+
 
+def _active_listing_count(user) -> int:
+    user_id = getattr(user, "pk", None)
+    cached = memo.get(user_id, ACTIVE_LISTINGS)
+    if cached is not memo.MISSING:
+        return cached
+    with replica_reads([user_id]):
+        used = get_usage_count(user_id, ACTIVE_LISTINGS)
+    return memo.remember(user_id, ACTIVE_LISTINGS, used)
 
+
+async def _aactive_listing_count(user) -> int:
+    user_id = getattr(user, "pk", None)
+    cached = memo.get(user_id, ACTIVE_LISTINGS)
+    if cached is not memo.MISSING:
+        return cached
+    with replica_reads([user_id]):
+        used = await aget_usage_count(user_id, ACTIVE_LISTINGS)
+    return memo.remember(user_id, ACTIVE_LISTINGS, used)
+
+
+@instrument
+def can_post_listing(user):
+    snapshot = _entitlement_snapshot(user)
+    used = _active_listing_count(user) if _listing_limit(snapshot) is not None else 0
+    return _listing_decision(snapshot, used)
+
+
+@instrument
+async def acan_post_listing(user):
+    snapshot = await _aentitlement_snapshot(user)
+    used = await _aactive_listing_count(user) if _listing_limit(snapshot) is not None else 0
+    return _listing_decision(snapshot, used)
+
+
+@instrument
 def consume_featured_credit(user, listing_id=None, reason: str = "consume"):
-    subscription = get_active_subscription(user)
+    with primary_reads():
+        subscription = get_active_subscription(user)
+    if not subscription or subscription.status != SubscriptionStatus.ACTIVE:
+        set_outcome("no_active_subscription")
+        return False
+    consumed = _consume_credit(subscription, listing_id=listing_id, reason=reason)
+    set_outcome("consumed" if consumed else "insufficient")
+    return consumed
+
+
+@instrument
+def consume_featured_credits(user, listing_ids, reason: str = "consume", allow_partial: bool = False) -> list:
+    with primary_reads():
+        subscription = get_active_subscription(user)
+    if not subscription or subscription.status != SubscriptionStatus.ACTIVE:
+        set_outcome("no_active_subscription")
+        return []
+    charged = _consume_credits(subscription, listing_ids, reason=reason, allow_partial=allow_partial)
+    set_outcome("consumed" if charged else "insufficient")
+    return charged
+
+
+@instrument
+async def aconsume_featured_credit(user, listing_id=None, reason: str = "consume"):
+    with primary_reads():
+        subscription = await aget_active_subscription(user)
     if not subscription or subscription.status != SubscriptionStatus.ACTIVE:
+        set_outcome("no_active_subscription")
         return False
-    return _consume_credit(subscription, listing_id=listing_id, reason=reason)
+    # Row locks need a transaction, which the async ORM cannot open; run the debit in a thread.
+    consumed = await sync_to_async(_consume_credit)(subscription, listing_id=listing_id, reason=reason)
+    set_outcome("consumed" if consumed else "insufficient")
+    return consumed
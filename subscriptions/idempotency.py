@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+from .conf import processed_order_cache_alias, processed_order_cache_timeout, processed_order_lru_size
+
+KEY_PREFIX = "subscriptions:processed-order"
+
+_recent: OrderedDict[str, None] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _shared_cache():
+    alias = processed_order_cache_alias()
+    return caches[alias] if alias else None
+
+
+def _key(reference: str) -> str:
+    return f"{KEY_PREFIX}:{reference}"
+
+
+def _remember_locally(references) -> None:
+    size = processed_order_lru_size()
+    if size <= 0:
+        return
+    with _lock:
+        for reference in references:
+            _recent[reference] = None
+            _recent.move_to_end(reference)
+        while len(_recent) > size:
+            _recent.popitem(last=False)
+
+
+def recently_processed(references) -> set:
+    """Return the references known to be processed, without touching the database."""
+    references = set(references)
+    with _lock:
+        found = {reference for reference in references if reference in _recent}
+        for reference in found:
+            _recent.move_to_end(reference)
+
+    cache = _shared_cache()
+    missing = references - found
+    if cache is not None and missing:
+        shared = cache.get_many([_key(reference) for reference in missing])
+        hits = {reference for reference in missing if _key(reference) in shared}
+        _remember_locally(hits)
+        found |= hits
+    return found
+
+
+def remember(references) -> None:
+    """Record committed references; call from ``transaction.on_commit``."""
+    references = list(references)
+    if not references:
+        return
+    _remember_locally(references)
+    cache = _shared_cache()
+    if cache is not None:
+        cache.set_many(
+            {_key(reference): True for reference in references}, timeout=processed_order_cache_timeout()
+        )
+
+
+def clear() -> None:
+    with _lock:
+        _recent.clear()
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from subscriptions.services import archive_credit_ledger
+
+
+class Command(BaseCommand):
+    help = "Checkpoint credit balances and move old ledger entries to the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=90,
+            help="Archive ledger entries created more than this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Subscriptions per transaction and entries per insert (default SUBSCRIPTIONS_ARCHIVE_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be checkpointed and archived without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        if options["older_than_days"] < 1:
+            raise CommandError("--older-than-days must be at least 1.")
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        checkpoints, archived = archive_credit_ledger(
+            cutoff, batch_size=options["batch_size"], dry_run=options["dry_run"]
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"Would write {checkpoints} checkpoint(s) and archive {archived} ledger entries.")
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {checkpoints} checkpoint(s) and archived {archived} ledger entries.")
+        )
@@ -0,0 +1,59 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+from subscriptions.services import consume_subscription_events
+
+
+class Command(BaseCommand):
+    help = "Hand new subscription events to a consumer in batches, advancing its cursor."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--consumer", required=True, help="Cursor name; each consumer keeps its own position.")
+        parser.add_argument(
+            "--handler",
+            default=None,
+            help="Dotted path to a callable that receives each list of events. Defaults to printing JSON lines.",
+        )
+        parser.add_argument("--batch-size", type=int, default=None, help="Events handed over per batch.")
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new events instead of exiting once caught up.",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0, help="Seconds to sleep when caught up (with --loop)."
+        )
+
+    def handle(self, *args, **options):
+        handler = import_string(options["handler"]) if options["handler"] else self._print_events
+        total = 0
+        while True:
+            handled = consume_subscription_events(options["consumer"], handler, batch_size=options["batch_size"])
+            total += handled
+            if handled:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["poll_interval"])
+
+        self.stderr.write(self.style.SUCCESS(f"Handled {total} event(s) for {options['consumer']}."))
+
+    def _print_events(self, events):
+        for event in events:
+            self.stdout.write(
+                json.dumps(
+                    {
+                        "id": event.id,
+                        "event_type": event.event_type,
+                        "user_id": event.user_id,
+                        "subscription_id": event.subscription_id,
+                        "payload": event.payload,
+                        "created_at": event.created_at,
+                    },
+                    cls=DjangoJSONEncoder,
+                )
+            )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from subscriptions.services import iter_expire_due_subscriptions
+
+
+class Command(BaseCommand):
+    help = "Expire subscriptions whose current period has ended, in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Subscriptions expired per transaction.")
+        parser.add_argument(
+            "--time-budget",
+            type=float,
+            default=None,
+            help="Stop starting new batches after this many seconds.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = 0
+        for number, ids in enumerate(
+            iter_expire_due_subscriptions(batch_size=options["batch_size"], time_budget=options["time_budget"]),
+            start=1,
+        ):
+            total += len(ids)
+            self.stdout.write(f"Batch {number}: expired {len(ids)} subscription(s) ({total} total).")
+
+        budget = options["time_budget"]
+        if budget and time.monotonic() - started >= budget:
+            self.stdout.write(self.style.WARNING("Time budget reached; remaining subscriptions are left for the next run."))
+        self.stdout.write(self.style.SUCCESS(f"Expired {total} subscription(s)."))
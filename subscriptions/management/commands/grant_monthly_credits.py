@@ -6,6 +6,17 @@ from subscriptions.services import grant_periodic_credits
 class Command(BaseCommand):
     help = "Grant monthly featured credits when a new billing period starts."
 
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Subscriptions granted per transaction.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many subscriptions would be granted without writing anything.",
+        )
+
     def handle(self, *args, **options):
-        created = grant_periodic_credits()
+        created = grant_periodic_credits(batch_size=options["batch_size"], dry_run=options["dry_run"])
+        if options["dry_run"]:
+            self.stdout.write(f"Would grant credits to {created} subscription(s).")
+            return
         self.stdout.write(self.style.SUCCESS(f"Granted credits to {created} subscription(s)."))
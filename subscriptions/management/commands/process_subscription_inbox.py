@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from subscriptions.services import process_subscription_inbox
+
+
+class Command(BaseCommand):
+    help = "Apply paid orders queued in the subscription inbox. Safe to run as several parallel workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Messages claimed per batch.")
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new messages instead of exiting once the inbox is drained.",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0, help="Seconds to sleep when the inbox is empty (with --loop)."
+        )
+
+    def handle(self, *args, **options):
+        total_processed = total_failed = 0
+        while True:
+            processed, failed = process_subscription_inbox(batch_size=options["batch_size"])
+            if processed or failed:
+                total_processed += processed
+                total_failed += failed
+                self.stdout.write(f"Processed {processed} message(s); {failed} failed.")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["poll_interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Processed {total_processed} message(s); {total_failed} attempt(s) failed.")
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from subscriptions.services import rebuild_credit_balances
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized credit balances from the credit ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report balances that disagree with the ledger; do not change anything.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Subscriptions to check per transaction (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        check_only = options["check"]
+        mismatches = rebuild_credit_balances(check_only=check_only, batch_size=options["batch_size"])
+        for subscription_id, credit_type, stored, expected in mismatches:
+            self.stdout.write(
+                f"{subscription_id} [{credit_type}]: stored={stored} ledger={expected}"
+            )
+
+        if check_only and mismatches:
+            raise CommandError(f"{len(mismatches)} balance(s) disagree with the ledger.")
+        if check_only:
+            self.stdout.write(self.style.SUCCESS("All balances match the ledger."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(mismatches)} balance(s)."))
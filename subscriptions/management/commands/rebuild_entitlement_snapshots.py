@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from subscriptions.services import rebuild_entitlement_snapshots
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-user entitlement snapshot table from subscriptions and balances."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Users to recompute per transaction (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_entitlement_snapshots(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} entitlement snapshot(s)."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from subscriptions.usage import reconcile_usage_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute usage counters from the sources registered with subscriptions.usage.register_usage_source."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--metric", help="Only reconcile this metric (default: every registered metric).")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report counters that disagree with their source; do not change anything.",
+        )
+
+    def handle(self, *args, **options):
+        check_only = options["check"]
+        try:
+            mismatches = reconcile_usage_counters(options["metric"], check_only=check_only)
+        except LookupError as exc:
+            raise CommandError(str(exc)) from exc
+        for user_id, metric, stored, expected in mismatches:
+            self.stdout.write(f"{user_id} [{metric}]: stored={stored} source={expected}")
+
+        if check_only and mismatches:
+            raise CommandError(f"{len(mismatches)} counter(s) disagree with their source.")
+        if check_only:
+            self.stdout.write(self.style.SUCCESS("All counters match their source."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Reconciled {len(mismatches)} counter(s)."))
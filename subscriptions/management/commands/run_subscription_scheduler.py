@@ -0,0 +1,66 @@
+import signal
+import threading
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from subscriptions.scheduler import EXPIRE, GRANT, SubscriptionScheduler
+
+
+class Command(BaseCommand):
+    help = "Expire subscriptions and grant period credits as each boundary passes, instead of on a cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window-minutes", type=int, default=60, help="How far ahead boundaries are kept in memory."
+        )
+        parser.add_argument(
+            "--refresh-seconds",
+            type=int,
+            default=60,
+            help="How often the window is extended and new activations/renewals are picked up.",
+        )
+        parser.add_argument(
+            "--resync-minutes", type=int, default=15, help="How often the whole window is reloaded from the database."
+        )
+        parser.add_argument("--batch-size", type=int, default=None, help="Subscriptions handled per transaction.")
+        parser.add_argument(
+            "--max-runtime",
+            type=float,
+            default=None,
+            help="Exit cleanly after this many seconds, e.g. to let a supervisor recycle the process.",
+        )
+
+    def handle(self, *args, **options):
+        if options["window_minutes"] < 1 or options["refresh_seconds"] < 1 or options["resync_minutes"] < 1:
+            raise CommandError("--window-minutes, --refresh-seconds and --resync-minutes must be at least 1.")
+
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write("Shutdown requested; finishing the current batch.")
+            stop.set()
+
+        previous = {sig: signal.signal(sig, request_stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+        scheduler = SubscriptionScheduler(
+            window=timedelta(minutes=options["window_minutes"]),
+            refresh_interval=timedelta(seconds=options["refresh_seconds"]),
+            resync_interval=timedelta(minutes=options["resync_minutes"]),
+            batch_size=options["batch_size"],
+        )
+        deadline = None
+        if options["max_runtime"] is not None:
+            deadline = timezone.now() + timedelta(seconds=options["max_runtime"])
+        try:
+            scheduler.run(stop, deadline=deadline)
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scheduler stopped: expired {scheduler.stats[EXPIRE]} subscription(s), "
+                f"granted credits to {scheduler.stats[GRANT]}."
+            )
+        )
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_scope: ContextVar[dict | None] = ContextVar("subscriptions_entitlement_scope", default=None)
+
+MISSING = object()
+
+
+@contextmanager
+def entitlement_scope():
+    """Memoize entitlement lookups per user until the block exits."""
+    token = _scope.set({})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def get(user_id, key):
+    memo = _scope.get()
+    if memo is None or user_id is None:
+        return MISSING
+    return memo.get(user_id, {}).get(key, MISSING)
+
+
+def remember(user_id, key, value):
+    memo = _scope.get()
+    if memo is not None and user_id is not None:
+        memo.setdefault(user_id, {})[key] = value
+    return value
+
+
+def invalidate(user_id=None) -> None:
+    memo = _scope.get()
+    if memo is None:
+        return
+    if user_id is None:
+        memo.clear()
+    else:
+        memo.pop(user_id, None)
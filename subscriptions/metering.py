@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .conf import usage_buffer_size, usage_enabled, usage_flush_seconds
+from .entitlements import get_active_subscription
+from .metrics import instrument, set_outcome
+from .models import SubscriptionUsageRollup
+from .routers import replica_reads
+from .selectors import get_usage_rollup_count
+
+logger = logging.getLogger(__name__)
+
+DAY = SubscriptionUsageRollup.Granularity.DAY
+MONTH = SubscriptionUsageRollup.Granularity.MONTH
+
+
+def _month(day):
+    return day.replace(day=1)
+
+
+def _merge(target: dict, source: dict, sign: int = 1) -> None:
+    for key, amount in source.items():
+        total = target.get(key, 0) + sign * amount
+        if total:
+            target[key] = total
+        else:
+            target.pop(key, None)
+
+
+class UsageBuffer:
+    """Usage recorded by this process, summed per ``(user_id, metric, day)`` until flushed.
+
+    Monthly totals are kept alongside so quota checks can add the unflushed delta,
+    including totals that are being written by a flush right now.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._days = {}
+            self._months = {}
+            self._flushing = {}
+            self._since = self.clock()
+
+    def _due(self) -> bool:
+        if not self._days:
+            return False
+        return len(self._days) >= usage_buffer_size() or self.clock() - self._since >= usage_flush_seconds()
+
+    def add(self, user_id, metric: str, day, amount: int) -> bool:
+        """Buffer ``amount``; returns ``True`` once a size or age threshold is reached."""
+        with self._lock:
+            _merge(self._days, {(user_id, metric, day): amount})
+            _merge(self._months, {(user_id, metric, _month(day)): amount})
+            return self._due()
+
+    def is_due(self) -> bool:
+        with self._lock:
+            return self._due()
+
+    def pending(self, user_id, metric: str, month) -> int:
+        key = (user_id, metric, month)
+        with self._lock:
+            return self._months.get(key, 0) + self._flushing.get(key, 0)
+
+    def drain(self) -> tuple[dict, dict]:
+        with self._lock:
+            days, months = self._days, self._months
+            self._days, self._months = {}, {}
+            _merge(self._flushing, months)
+            self._since = self.clock()
+            return days, months
+
+    def finish(self, days: dict, months: dict, *, written: bool) -> None:
+        with self._lock:
+            _merge(self._flushing, months, sign=-1)
+            if not written:
+                _merge(self._days, days)
+                _merge(self._months, months)
+
+
+_buffer = UsageBuffer()
+
+
+def record_usage(user, metric: str, amount: int = 1, *, at=None) -> None:
+    """Count ``amount`` of ``metric`` for ``user`` without touching the database.
+
+    The buffer is flushed once it holds ``SUBSCRIPTIONS_USAGE_BUFFER_SIZE`` buckets or
+    is ``SUBSCRIPTIONS_USAGE_FLUSH_SECONDS`` old, after the current transaction commits.
+    """
+    if not usage_enabled() or not amount:
+        return
+    if _buffer.add(getattr(user, "pk", user), metric, timezone.localdate(at), amount):
+        # Checked on every call: if this transaction rolls back, the next record schedules
+        # again. Callbacks that find the buffer already flushed return without a query.
+        db_transaction.on_commit(flush_if_due)
+
+
+def _write_rollups(days: dict, months: dict) -> None:
+    rows = {(user_id, metric, DAY, day): amount for (user_id, metric, day), amount in days.items()}
+    rows.update({(user_id, metric, MONTH, month): amount for (user_id, metric, month), amount in months.items()})
+    by_amount = {}
+    for (user_id, metric, granularity, period_start), amount in rows.items():
+        by_amount.setdefault((metric, granularity, period_start, amount), []).append(user_id)
+
+    with db_transaction.atomic():
+        SubscriptionUsageRollup.objects.bulk_create(
+            [
+                SubscriptionUsageRollup(user_id=user_id, metric=metric, granularity=granularity, period_start=start)
+                for user_id, metric, granularity, start in sorted(rows)
+            ],
+            ignore_conflicts=True,
+        )
+        for (metric, granularity, period_start, amount), user_ids in by_amount.items():
+            SubscriptionUsageRollup.objects.filter(
+                metric=metric, granularity=granularity, period_start=period_start, user_id__in=user_ids
+            ).update(count=F("count") + amount)
+
+
+@instrument
+def flush_usage() -> int:
+    """Add buffered usage to the daily and monthly rollups; returns the buckets flushed.
+
+    If the write fails the usage goes back into the buffer for the next flush.
+    """
+    days, months = _buffer.drain()
+    if not days:
+        return 0
+    try:
+        _write_rollups(days, months)
+    except BaseException:
+        _buffer.finish(days, months, written=False)
+        raise
+    _buffer.finish(days, months, written=True)
+    return len(days)
+
+
+def flush_if_due() -> None:
+    """Flush if a size or age threshold is reached; a failure is logged and the usage stays buffered."""
+    if not _buffer.is_due():
+        return
+    try:
+        flush_usage()
+    except Exception:
+        logger.exception("Flushing buffered subscription usage failed.")
+
+
+def get_usage(user, metric: str, *, at=None) -> int:
+    """Return ``metric``'s total for ``user`` in the month of ``at``, unflushed usage included."""
+    user_id = getattr(user, "pk", user)
+    month = _month(timezone.localdate(at))
+    with replica_reads([user_id]):
+        stored = get_usage_rollup_count(user_id, metric, MONTH, month)
+    return stored + _buffer.pending(user_id, metric, month)
+
+
+@instrument
+def check_usage_quota(user, metric: str, amount: int = 1) -> bool:
+    """Whether ``amount`` more of ``metric`` fits in the plan's ``usage_quotas`` this month."""
+    if not usage_enabled():
+        return True
+    subscription = get_active_subscription(user)
+    if subscription is None:
+        set_outcome("no_active_subscription")
+        return False
+    limit = (subscription.plan.usage_quotas or {}).get(metric)
+    if limit is None:
+        set_outcome("unlimited")
+        return True
+    allowed = get_usage(user, metric) + amount <= limit
+    set_outcome("within_quota" if allowed else "quota_exceeded")
+    return allowed
+
+
+def _flush_at_exit() -> None:
+    try:
+        flush_usage()
+    except Exception:
+        logger.exception("Flushing buffered subscription usage at exit failed.")
+
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import abc
+import functools
+import inspect
+import threading
+import time
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import import_string
+
+from .conf import metrics_backend_path
+
+PREFIX = "subscriptions"
+
+
+class MetricsBackend(abc.ABC):
+    """Interface for metrics sinks; subclass and point ``SUBSCRIPTIONS_METRICS_BACKEND`` at it."""
+
+    @abc.abstractmethod
+    def increment(self, name: str, value: int = 1, tags: dict | None = None) -> None: ...
+
+    @abc.abstractmethod
+    def timing(self, name: str, milliseconds: float, tags: dict | None = None) -> None: ...
+
+    @abc.abstractmethod
+    def histogram(self, name: str, value: float, tags: dict | None = None) -> None: ...
+
+
+class NullBackend(MetricsBackend):
+    def increment(self, name, value=1, tags=None):
+        pass
+
+    def timing(self, name, milliseconds, tags=None):
+        pass
+
+    def histogram(self, name, value, tags=None):
+        pass
+
+
+class InMemoryBackend(MetricsBackend):
+    """Keeps every sample in memory; meant for tests and local debugging."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def _key(self, name, tags):
+        return name, tuple(sorted((tags or {}).items()))
+
+    def increment(self, name, value=1, tags=None):
+        key = self._key(name, tags)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def timing(self, name, milliseconds, tags=None):
+        with self._lock:
+            self.timings.setdefault(self._key(name, tags), []).append(milliseconds)
+
+    def histogram(self, name, value, tags=None):
+        with self._lock:
+            self.histograms.setdefault(self._key(name, tags), []).append(value)
+
+    def counter(self, name: str, **tags) -> int:
+        with self._lock:
+            return self.counters.get(self._key(name, tags), 0)
+
+    def samples(self, name: str, **tags) -> list:
+        with self._lock:
+            key = self._key(name, tags)
+            return list(self.timings.get(key) or self.histograms.get(key) or [])
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters = {}
+            self.timings = {}
+            self.histograms = {}
+
+
+_resolved: tuple = (None, None)
+_resolved_lock = threading.Lock()
+
+
+def get_backend() -> MetricsBackend | None:
+    """Return the configured backend instance, or ``None`` when metrics are disabled."""
+    global _resolved
+    path = metrics_backend_path()
+    if path == _resolved[0]:
+        return _resolved[1]
+    with _resolved_lock:
+        if path != _resolved[0]:
+            _resolved = (path, import_string(path)() if path else None)
+        return _resolved[1]
+
+
+class _Call:
+    __slots__ = ("parent", "queries", "outcome")
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.queries = 0
+        self.outcome = None
+
+
+_current: ContextVar[_Call | None] = ContextVar("subscriptions_metrics_call", default=None)
+
+
+def set_outcome(outcome: str) -> None:
+    """Label the innermost instrumented call that is running; a no-op when metrics are off."""
+    call = _current.get()
+    if call is not None:
+        call.outcome = outcome
+
+
+def _count_query(execute, sql, params, many, context):
+    call = _current.get()
+    while call is not None:
+        call.queries += 1
+        call = call.parent
+    return execute(sql, params, many, context)
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+connection_created.connect(_install_query_counter, dispatch_uid="subscriptions.metrics.query_counter")
+
+
+def _report(backend, name: str, call: _Call, started: float) -> None:
+    elapsed = (time.perf_counter() - started) * 1000
+    tags = {"outcome": call.outcome or "ok"}
+    backend.increment(f"{PREFIX}.{name}.calls", tags=tags)
+    backend.timing(f"{PREFIX}.{name}.duration_ms", elapsed, tags=tags)
+    backend.histogram(f"{PREFIX}.{name}.queries", call.queries, tags=tags)
+
+
+def instrument(func=None, *, name: str | None = None):
+    """Report call count, latency and query count for ``func`` to the metrics backend.
+
+    Works on plain and ``async`` functions. With no backend configured the wrapper
+    calls straight through.
+    """
+    if func is None:
+        return functools.partial(instrument, name=name)
+    metric = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            backend = get_backend()
+            if backend is None:
+                return await func(*args, **kwargs)
+            call = _Call(_current.get())
+            token = _current.set(call)
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except BaseException:
+                call.outcome = "error"
+                raise
+            finally:
+                _current.reset(token)
+                _report(backend, metric, call, started)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        backend = get_backend()
+        if backend is None:
+            return func(*args, **kwargs)
+        call = _Call(_current.get())
+        token = _current.set(call)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            call.outcome = "error"
+            raise
+        finally:
+            _current.reset(token)
+            _report(backend, metric, call, started)
+
+    return wrapper
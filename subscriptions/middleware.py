@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from django.utils.functional import SimpleLazyObject
+
+from .entitlements import get_active_subscription, get_entitlements
+from .memo import entitlement_scope
+
+
+def _request_user(request):
+    user = getattr(request, "user", None)
+    if user is None or not getattr(user, "is_authenticated", False):
+        return None
+    return user
+
+
+class _MemoizedLookup(SimpleLazyObject):
+    """A lazy proxy that repeats its lookup on every access instead of keeping the first result.
+
+    The lookups hit the request memo, so repeating them is cheap, and a write that drops
+    the memo (consuming, granting, activation) shows up on the next access.
+    """
+
+    @property
+    def _wrapped(self):
+        return self._setupfunc()
+
+
+class SubscriptionMiddleware:
+    """Attach lazy ``request.subscription`` / ``request.entitlements`` and memoize lookups per request.
+
+    Place it after ``AuthenticationMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with entitlement_scope():
+            request.subscription = _MemoizedLookup(lambda: self._subscription(request))
+            request.entitlements = _MemoizedLookup(lambda: self._entitlements(request))
+            return self.get_response(request)
+
+    def _subscription(self, request):
+        user = _request_user(request)
+        return get_active_subscription(user) if user else None
+
+    def _entitlements(self, request):
+        return get_entitlements(_request_user(request))
@@ -0,0 +1,64 @@
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+import uuid
+
+
+def populate_balances(apps, schema_editor):
+    SubscriptionCreditLedger = apps.get_model("subscriptions", "SubscriptionCreditLedger")
+    SubscriptionCreditBalance = apps.get_model("subscriptions", "SubscriptionCreditBalance")
+    totals = (
+        SubscriptionCreditLedger.objects.values("subscription_id", "credit_type")
+        .annotate(total=Sum("change"))
+        .order_by()
+    )
+    SubscriptionCreditBalance.objects.bulk_create(
+        [
+            SubscriptionCreditBalance(
+                subscription_id=row["subscription_id"],
+                credit_type=row["credit_type"],
+                balance=row["total"] or 0,
+            )
+            for row in totals
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("subscriptions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubscriptionCreditBalance",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                (
+                    "credit_type",
+                    models.CharField(
+                        choices=[("featured", "Featured")], max_length=50
+                    ),
+                ),
+                ("balance", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "subscription",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="credit_balances",
+                        to="subscriptions.usersubscription",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="subscriptioncreditbalance",
+            constraint=models.UniqueConstraint(
+                fields=("subscription", "credit_type"),
+                name="unique_credit_balance_per_subscription",
+            ),
+        ),
+        migrations.RunPython(populate_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("subscriptions", "0002_subscriptioncreditbalance"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="usersubscription",
+            index=models.Index(
+                fields=["user", "status", "current_period_end"], name="usersub_user_status_end_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usersubscription",
+            index=models.Index(
+                condition=models.Q(status="active"),
+                fields=["current_period_end", "id"],
+                name="usersub_active_end_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subscriptioncreditledger",
+            index=models.Index(
+                fields=["subscription", "credit_type", "change"],
+                name="ledger_sub_type_change_idx",
+            ),
+        ),
+    ]
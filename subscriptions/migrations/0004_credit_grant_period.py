@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("subscriptions", "0003_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subscriptioncreditledger",
+            name="grant_period",
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="subscriptioncreditledger",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(grant_period__isnull=False),
+                fields=("subscription", "reason", "grant_period"),
+                name="unique_credit_grant_per_period",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usersubscription",
+            index=models.Index(
+                condition=models.Q(status="active"),
+                fields=["current_period_start"],
+                name="usersub_active_start_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("subscriptions", "0004_credit_grant_period"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubscriptionCreditCheckpoint",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                (
+                    "credit_type",
+                    models.CharField(
+                        choices=[("featured", "Featured")], max_length=50
+                    ),
+                ),
+                ("balance", models.IntegerField()),
+                ("covers_until", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "subscription",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="credit_checkpoints",
+                        to="subscriptions.usersubscription",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-covers_until"],
+                "indexes": [
+                    models.Index(
+                        fields=["subscription", "credit_type", "covers_until"],
+                        name="checkpoint_sub_type_until_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="SubscriptionCreditLedgerArchive",
+            fields=[
+                ("id", models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                (
+                    "credit_type",
+                    models.CharField(
+                        choices=[("featured", "Featured")], max_length=50
+                    ),
+                ),
+                ("change", models.IntegerField()),
+                ("reason", models.CharField(max_length=255)),
+                ("related_order_reference", models.CharField(blank=True, max_length=255, null=True)),
+                ("related_listing_id", models.UUIDField(blank=True, null=True)),
+                ("grant_period", models.CharField(blank=True, max_length=32, null=True)),
+                ("created_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "subscription",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="archived_credit_entries",
+                        to="subscriptions.usersubscription",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_subscription_credit_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "verbose_name": "archived credit ledger entry",
+                "verbose_name_plural": "archived credit ledger entries",
+            },
+        ),
+    ]
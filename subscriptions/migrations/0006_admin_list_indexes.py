@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("subscriptions", "0005_credit_checkpoints_and_archive"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subscriptioncreditledger",
+            index=models.Index(fields=["created_at"], name="ledger_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="subscriptioncreditledger",
+            index=models.Index(fields=["related_order_reference"], name="ledger_order_ref_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="subscriptioncreditledgerarchive",
+            index=models.Index(fields=["created_at"], name="ledger_archive_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="subscriptioncreditledgerarchive",
+            index=models.Index(fields=["related_order_reference"], name="ledger_archive_order_ref_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="processedsubscriptionorder",
+            index=models.Index(fields=["processed_at"], name="processed_order_at_idx"),
+        ),
+    ]
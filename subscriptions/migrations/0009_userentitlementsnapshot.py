@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("subscriptions", "0008_subscription_events"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserEntitlementSnapshot",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="entitlement_snapshot",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("plan_key", models.CharField(blank=True, max_length=50)),
+                ("max_active_listings", models.IntegerField(blank=True, null=True)),
+                ("badge_label", models.CharField(blank=True, max_length=150)),
+                ("priority_support", models.BooleanField(default=False)),
+                ("featured_credits_balance", models.IntegerField(default=0)),
+                ("valid_until", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "subscription",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="subscriptions.usersubscription",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("subscriptions", "0011_usage_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subscriptioneventcursor",
+            name="gaps",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
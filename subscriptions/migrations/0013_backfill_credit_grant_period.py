@@ -0,0 +1,48 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def backfill_grant_period(apps, schema_editor):
+    """Key legacy monthly grants by the local day they were written, as ``grant_periodic_credits`` does.
+
+    Without the key, the first run after upgrading grants again to subscriptions already
+    granted that day. When a subscription has several grants on one day, only the earliest
+    is keyed, so the unique constraint holds.
+    """
+    SubscriptionCreditLedger = apps.get_model("subscriptions", "SubscriptionCreditLedger")
+    grants = SubscriptionCreditLedger.objects.filter(reason="monthly_grant")
+    legacy = grants.filter(grant_period__isnull=True)
+    after = None
+    while True:
+        chunk = legacy.order_by("subscription_id").values_list("subscription_id", flat=True).distinct()
+        if after is not None:
+            chunk = chunk.filter(subscription_id__gt=after)
+        subscription_ids = list(chunk[:500])
+        if not subscription_ids:
+            return
+        after = subscription_ids[-1]
+
+        taken = set(
+            grants.filter(subscription_id__in=subscription_ids, grant_period__isnull=False).values_list(
+                "subscription_id", "grant_period"
+            )
+        )
+        entries = []
+        for entry in legacy.filter(subscription_id__in=subscription_ids).order_by("created_at", "pk"):
+            key = (entry.subscription_id, timezone.localdate(entry.created_at).isoformat())
+            if key in taken:
+                continue
+            taken.add(key)
+            entry.grant_period = key[1]
+            entries.append(entry)
+        SubscriptionCreditLedger.objects.bulk_update(entries, ["grant_period"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("subscriptions", "0012_subscriptioneventcursor_gaps"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_grant_period, migrations.RunPython.noop),
+    ]
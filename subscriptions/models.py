@@ -5,6 +5,7 @@ from datetime import timedelta
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.db.models import Q
 from django.utils import timezone
@@ -34,6 +35,8 @@ class SubscriptionPlan(models.Model):
     badge_label = models.CharField(max_length=150, blank=True)
     priority_support = models.BooleanField(default=False)
     can_add_multiple_staff = models.BooleanField(default=False)
+    # Per-period allowances for metered usage, e.g. {"bumps": 20}; metrics not listed are unlimited.
+    usage_quotas = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -83,6 +86,19 @@ class UserSubscription(models.Model):
 
     class Meta:
         ordering = ["-current_period_end", "-created_at"]
+        indexes = [
+            models.Index(fields=["user", "status", "current_period_end"], name="usersub_user_status_end_idx"),
+            models.Index(
+                fields=["current_period_end", "id"],
+                condition=Q(status=SubscriptionStatus.ACTIVE),
+                name="usersub_active_end_idx",
+            ),
+            models.Index(
+                fields=["current_period_start"],
+                condition=Q(status=SubscriptionStatus.ACTIVE),
+                name="usersub_active_start_idx",
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["user"],
@@ -123,15 +139,105 @@ class SubscriptionCreditLedger(models.Model):
     reason = models.CharField(max_length=255)
     related_order_reference = models.CharField(max_length=255, null=True, blank=True)
     related_listing_id = models.UUIDField(null=True, blank=True)
+    grant_period = models.CharField(max_length=32, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["subscription", "reason", "grant_period"],
+                condition=Q(grant_period__isnull=False),
+                name="unique_credit_grant_per_period",
+            ),
+        ]
+        indexes = [
+            # ``change`` is a trailing key column so balance sums are index-only on every backend.
+            models.Index(
+                fields=["subscription", "credit_type", "change"],
+                name="ledger_sub_type_change_idx",
+            ),
+            models.Index(fields=["created_at"], name="ledger_created_idx"),
+            models.Index(fields=["related_order_reference"], name="ledger_order_ref_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.credit_type}: {self.change}"
 
 
+class SubscriptionCreditCheckpoint(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subscription = models.ForeignKey(
+        UserSubscription, on_delete=models.PROTECT, related_name="credit_checkpoints"
+    )
+    credit_type = models.CharField(max_length=50, choices=SubscriptionCreditLedger.CreditType.choices)
+    balance = models.IntegerField()
+    covers_until = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-covers_until"]
+        indexes = [
+            models.Index(
+                fields=["subscription", "credit_type", "covers_until"], name="checkpoint_sub_type_until_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.credit_type}: {self.balance} @ {self.covers_until:%Y-%m-%d}"
+
+
+class SubscriptionCreditLedgerArchive(models.Model):
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_subscription_credit_entries"
+    )
+    subscription = models.ForeignKey(
+        UserSubscription, on_delete=models.PROTECT, related_name="archived_credit_entries"
+    )
+    credit_type = models.CharField(max_length=50, choices=SubscriptionCreditLedger.CreditType.choices)
+    change = models.IntegerField()
+    reason = models.CharField(max_length=255)
+    related_order_reference = models.CharField(max_length=255, null=True, blank=True)
+    related_listing_id = models.UUIDField(null=True, blank=True)
+    grant_period = models.CharField(max_length=32, null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "archived credit ledger entry"
+        verbose_name_plural = "archived credit ledger entries"
+        indexes = [
+            models.Index(fields=["created_at"], name="ledger_archive_created_idx"),
+            models.Index(fields=["related_order_reference"], name="ledger_archive_order_ref_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.credit_type}: {self.change}"
+
+
+class SubscriptionCreditBalance(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subscription = models.ForeignKey(
+        UserSubscription, on_delete=models.CASCADE, related_name="credit_balances"
+    )
+    credit_type = models.CharField(max_length=50, choices=SubscriptionCreditLedger.CreditType.choices)
+    balance = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["subscription", "credit_type"],
+                name="unique_credit_balance_per_subscription",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.credit_type}: {self.balance}"
+
+
 class ProcessedSubscriptionOrder(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     order_reference = models.CharField(max_length=255, unique=True)
@@ -145,6 +251,151 @@ class ProcessedSubscriptionOrder(models.Model):
 
     class Meta:
         ordering = ["-processed_at"]
+        indexes = [
+            models.Index(fields=["processed_at"], name="processed_order_at_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.order_reference} -> {self.plan.key}"
+
+
+class SubscriptionInboxMessage(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        PROCESSING = "processing", "Processing"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    order_reference = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="subscription_inbox_messages"
+    )
+    skus = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Next time a worker may claim the message: the retry time while pending, the lease expiry while processing.
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["available_at"]
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="inbox_status_available_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.order_reference} ({self.status})"
+
+
+class SubscriptionEvent(models.Model):
+    class EventType(models.TextChoices):
+        ACTIVATED = "activated", "Activated"
+        RENEWED = "renewed", "Renewed"
+        PLAN_CHANGED = "plan_changed", "Plan changed"
+        EXPIRED = "expired", "Expired"
+        CREDITS_GRANTED = "credits_granted", "Credits granted"
+        CREDITS_CONSUMED = "credits_consumed", "Credits consumed"
+
+    # Monotonic id doubles as the consumer cursor.
+    id = models.BigAutoField(primary_key=True)
+    event_type = models.CharField(max_length=50, choices=EventType.choices)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="subscription_events")
+    subscription = models.ForeignKey(
+        UserSubscription, on_delete=models.CASCADE, null=True, blank=True, related_name="events"
+    )
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["event_type", "id"], name="event_type_id_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.id}: {self.event_type}"
+
+
+class SubscriptionEventCursor(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    consumer = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    # ``[first_id, last_id, seen_at]`` id ranges skipped behind ``position``, rechecked on each drain.
+    gaps = models.JSONField(blank=True, default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.consumer} @ {self.position}"
+
+
+class UserEntitlementSnapshot(models.Model):
+    """One denormalized row per user, kept in step with the tables above by ``services``."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="entitlement_snapshot"
+    )
+    subscription = models.ForeignKey(
+        UserSubscription, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    plan_key = models.CharField(max_length=50, blank=True)
+    max_active_listings = models.IntegerField(null=True, blank=True)
+    badge_label = models.CharField(max_length=150, blank=True)
+    priority_support = models.BooleanField(default=False)
+    featured_credits_balance = models.IntegerField(default=0)
+    # The active subscription's period end; the row grants nothing once it has passed.
+    valid_until = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.user_id}: {self.plan_key or '-'}"
+
+
+class SubscriptionUsageCounter(models.Model):
+    class Metric(models.TextChoices):
+        ACTIVE_LISTINGS = "active_listings", "Active listings"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="subscription_usage_counters"
+    )
+    metric = models.CharField(max_length=50, choices=Metric.choices)
+    used = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "metric"], name="unique_usage_counter_per_user"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} {self.metric}: {self.used}"
+
+
+class SubscriptionUsageRollup(models.Model):
+    class Granularity(models.TextChoices):
+        DAY = "day", "Day"
+        MONTH = "month", "Month"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="subscription_usage_rollups"
+    )
+    metric = models.CharField(max_length=50)
+    granularity = models.CharField(max_length=10, choices=Granularity.choices)
+    period_start = models.DateField()
+    count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "metric", "granularity", "period_start"],
+                name="unique_usage_rollup_per_period",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} {self.metric} {self.granularity} {self.period_start}: {self.count}"
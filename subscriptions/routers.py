@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from .conf import primary_pin_cache_alias, primary_pin_seconds, read_database_alias
+
+KEY_PREFIX = "subscriptions:primary-pin"
+
+_read_alias: ContextVar[str | None] = ContextVar("subscriptions_read_alias", default=None)
+_primary_only: ContextVar[bool] = ContextVar("subscriptions_primary_only", default=False)
+_pins: dict = {}
+_pins_lock = threading.Lock()
+
+
+def _shared_cache():
+    alias = primary_pin_cache_alias()
+    return caches[alias] if alias else None
+
+
+def _key(user_id) -> str:
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+def is_enabled() -> bool:
+    return bool(read_database_alias())
+
+
+def pin_to_primary(user_ids) -> None:
+    """Send these users' reads to the primary for ``SUBSCRIPTIONS_PRIMARY_PIN_SECONDS``."""
+    seconds = primary_pin_seconds()
+    if not read_database_alias() or seconds <= 0:
+        return
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    now = time.monotonic()
+    with _pins_lock:
+        for user_id in user_ids:
+            _pins[user_id] = now + seconds
+        if len(_pins) > 10000:
+            for user_id in [user_id for user_id, until in _pins.items() if until <= now]:
+                del _pins[user_id]
+    cache = _shared_cache()
+    if cache is not None and user_ids:
+        cache.set_many({_key(user_id): True for user_id in user_ids}, timeout=max(1, round(seconds)))
+
+
+def is_pinned(user_ids) -> bool:
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    now = time.monotonic()
+    with _pins_lock:
+        if any(_pins.get(user_id, 0) > now for user_id in user_ids):
+            return True
+    cache = _shared_cache()
+    return bool(cache is not None and user_ids and cache.get_many([_key(user_id) for user_id in user_ids]))
+
+
+def clear_pins() -> None:
+    with _pins_lock:
+        _pins.clear()
+
+
+@contextmanager
+def replica_reads(user_ids=()):
+    """Route subscription reads in this block to the read database unless a user is pinned."""
+    alias = read_database_alias()
+    if alias is None or _primary_only.get() or is_pinned(user_ids):
+        yield
+        return
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Keep every subscription read in this block on the primary, even inside :func:`replica_reads`."""
+    token = _primary_only.set(True)
+    alias_token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(alias_token)
+        _primary_only.reset(token)
+
+
+class SubscriptionReadRouter:
+    """Add to ``DATABASE_ROUTERS`` to serve entitlement reads from ``SUBSCRIPTIONS_READ_DATABASE``.
+
+    Only reads made inside :func:`replica_reads` are routed; locking queries and writes
+    always go to the ``default`` database, including saves of objects read from the replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == "subscriptions":
+            return _read_alias.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Without this Django writes to the alias the instance was loaded from, so saving
+        # an object read inside ``replica_reads`` would go to the replica.
+        if model._meta.app_label == "subscriptions":
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, read_database_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import heapq
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .conf import expiry_batch_size
+from .models import SubscriptionEvent, UserSubscription
+from .selectors import get_latest_subscription_event_id, get_subscription_boundaries, get_subscription_events
+from .services import expire_due_subscriptions, expire_subscriptions, grant_periodic_credits
+
+EXPIRE = "expire"
+GRANT = "grant"
+
+# Events after which a subscription's period boundaries may have moved.
+BOUNDARY_EVENTS = (
+    SubscriptionEvent.EventType.ACTIVATED,
+    SubscriptionEvent.EventType.RENEWED,
+    SubscriptionEvent.EventType.PLAN_CHANGED,
+)
+
+
+def _batches(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class SubscriptionScheduler:
+    """Expire subscriptions and grant period credits at the moment their boundary passes.
+
+    Keeps a min-heap of upcoming ``current_period_end`` (expiry) and ``current_period_start``
+    (grant) boundaries for the next ``window``. Each refresh loads only the newly uncovered
+    part of the window, plus the subscriptions named by activation/renewal events since
+    the last refresh. The whole window is reloaded every ``resync_interval`` to pick up
+    edits made outside the services. Work is re-checked against the database when it
+    comes due, so a stale heap entry never acts on a changed row.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: timedelta = timedelta(hours=1),
+        refresh_interval: timedelta = timedelta(minutes=1),
+        resync_interval: timedelta = timedelta(minutes=15),
+        batch_size: int | None = None,
+        clock=timezone.now,
+    ):
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self.resync_interval = resync_interval
+        self.batch_size = batch_size or expiry_batch_size()
+        self.clock = clock
+        self._heap: list[tuple] = []
+        self._queued: set[tuple] = set()
+        self._loaded_until = None
+        self._next_refresh = None
+        self._next_resync = None
+        self._event_position = 0
+        self.stats = {EXPIRE: 0, GRANT: 0}
+
+    def start(self) -> None:
+        """Catch up on anything already overdue, then load the first window."""
+        now = self.clock()
+        self._event_position = get_latest_subscription_event_id()
+        self.stats[EXPIRE] += expire_due_subscriptions(now=now)
+        self.stats[GRANT] += grant_periodic_credits(now=now, batch_size=self.batch_size, started_only=True)
+        self.refresh(now)
+
+    def _push(self, kind: str, due_at, subscription_id) -> None:
+        entry = (due_at, kind, subscription_id)
+        if entry not in self._queued:
+            self._queued.add(entry)
+            heapq.heappush(self._heap, entry)
+
+    def _push_boundaries(self, ends, starts) -> None:
+        for due_at, subscription_id in ends:
+            self._push(EXPIRE, due_at, subscription_id)
+        for due_at, subscription_id in starts:
+            self._push(GRANT, due_at, subscription_id)
+
+    def refresh(self, now=None) -> None:
+        """Extend the window to ``now + window`` and queue boundaries moved by recent events."""
+        now = now or self.clock()
+        if self._next_resync is None or now >= self._next_resync:
+            self._loaded_until = now
+            self._next_resync = now + self.resync_interval
+        horizon = now + self.window
+        if horizon > self._loaded_until:
+            self._push_boundaries(*get_subscription_boundaries(self._loaded_until, horizon))
+            self._loaded_until = horizon
+
+        while True:
+            events = get_subscription_events(self._event_position, limit=self.batch_size, event_types=BOUNDARY_EVENTS)
+            if not events:
+                break
+            self._event_position = events[-1].id
+            changed = {event.subscription_id for event in events if event.subscription_id}
+            if changed:
+                self._push_boundaries(*get_subscription_boundaries(now, self._loaded_until, changed))
+        self._next_refresh = now + self.refresh_interval
+
+    def next_wakeup(self):
+        if self._heap:
+            return min(self._heap[0][0], self._next_refresh)
+        return self._next_refresh
+
+    def run_pending(self, now=None) -> int:
+        """Process every boundary that has passed, in batches; returns the number acted on."""
+        now = now or self.clock()
+        if now >= self._next_refresh:
+            self.refresh(now)
+
+        due = {EXPIRE: [], GRANT: []}
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            self._queued.discard(entry)
+            due[entry[1]].append(entry)
+
+        expired = granted = 0
+        for ids in _batches([subscription_id for _, _, subscription_id in due[EXPIRE]], self.batch_size):
+            expired += expire_subscriptions(UserSubscription.objects.filter(pk__in=ids, current_period_end__lte=now))
+
+        # Grants keep the cron job's per-day key, so running both never grants twice.
+        by_day = {}
+        for due_at, _, subscription_id in due[GRANT]:
+            by_day.setdefault(timezone.localdate(due_at), (due_at, []))[1].append(subscription_id)
+        for due_at, subscription_ids in by_day.values():
+            for ids in _batches(subscription_ids, self.batch_size):
+                granted += grant_periodic_credits(now=due_at, batch_size=self.batch_size, subscription_ids=ids)
+
+        self.stats[EXPIRE] += expired
+        self.stats[GRANT] += granted
+        return expired + granted
+
+    def run(self, stop: threading.Event, *, deadline=None) -> None:
+        """Loop until ``stop`` is set (or ``deadline`` passes), sleeping until the next boundary."""
+        self.start()
+        while not stop.is_set():
+            close_old_connections()
+            now = self.clock()
+            if deadline is not None and now >= deadline:
+                return
+            self.run_pending(now)
+            wakeup = self.next_wakeup()
+            if deadline is not None:
+                wakeup = min(wakeup, deadline)
+            stop.wait(max(0.0, (wakeup - self.clock()).total_seconds()))
@@ -1,38 +1,196 @@
 from __future__ import annotations
 
-from django.db.models import Sum
+from django.db.models import Max, Q, Sum
 from django.utils import timezone
 
+from . import catalog
 from .models import (
+    SubscriptionCreditBalance,
+    SubscriptionCreditCheckpoint,
     SubscriptionCreditLedger,
+    SubscriptionEvent,
     SubscriptionProduct,
     SubscriptionStatus,
+    SubscriptionUsageCounter,
+    SubscriptionUsageRollup,
+    UserEntitlementSnapshot,
     UserSubscription,
 )
 
 
 def get_subscription_product_by_sku(sku: str) -> SubscriptionProduct | None:
-    return (
-        SubscriptionProduct.objects.filter(sku=sku, is_active=True)
-        .select_related("plan")
-        .first()
-    )
+    """Return the active product for ``sku`` from the cached catalog snapshot."""
+    return catalog.get_product(sku)
 
 
-def get_active_subscription_for_user(user, now=None, for_update: bool = False) -> UserSubscription | None:
-    now = now or timezone.now()
+def _active_subscriptions(user, now, for_update: bool = False):
     qs = UserSubscription.objects.filter(
         user=user, status=SubscriptionStatus.ACTIVE, current_period_end__gt=now
     )
     if for_update:
         qs = qs.select_for_update()
-    return qs.order_by("-current_period_end", "-created_at").first()
+    else:
+        qs = qs.select_related("plan")
+    return qs.order_by("-current_period_end", "-created_at")
+
+
+def get_active_subscription_for_user(user, now=None, for_update: bool = False) -> UserSubscription | None:
+    return _active_subscriptions(user, now or timezone.now(), for_update=for_update).first()
+
+
+async def aget_active_subscription_for_user(user, now=None) -> UserSubscription | None:
+    return await _active_subscriptions(user, now or timezone.now()).afirst()
+
+
+def get_active_subscriptions_for_users(user_ids, now=None) -> dict:
+    now = now or timezone.now()
+    subscriptions = {}
+    qs = (
+        UserSubscription.objects.filter(
+            user_id__in=user_ids, status=SubscriptionStatus.ACTIVE, current_period_end__gt=now
+        )
+        .select_related("plan")
+        .order_by("user_id", "-current_period_end", "-created_at")
+    )
+    for subscription in qs:
+        subscriptions.setdefault(subscription.user_id, subscription)
+    return subscriptions
+
+
+def get_active_subscription_user_ids(user_ids, now=None) -> set:
+    now = now or timezone.now()
+    return set(
+        UserSubscription.objects.filter(
+            user_id__in=user_ids, status=SubscriptionStatus.ACTIVE, current_period_end__gt=now
+        ).values_list("user_id", flat=True)
+    )
+
+
+def _featured_balance(subscription: UserSubscription):
+    return SubscriptionCreditBalance.objects.filter(
+        subscription=subscription, credit_type=SubscriptionCreditLedger.CreditType.FEATURED
+    ).values_list("balance", flat=True)
+
+
+def get_entitlement_snapshot(user_id) -> UserEntitlementSnapshot | None:
+    return UserEntitlementSnapshot.objects.filter(pk=user_id).first()
+
+
+async def aget_entitlement_snapshot(user_id) -> UserEntitlementSnapshot | None:
+    return await UserEntitlementSnapshot.objects.filter(pk=user_id).afirst()
+
+
+def get_entitlement_snapshots(user_ids) -> dict:
+    return {row.user_id: row for row in UserEntitlementSnapshot.objects.filter(pk__in=list(user_ids))}
+
+
+def _usage_counter(user_id, metric: str):
+    return SubscriptionUsageCounter.objects.filter(user_id=user_id, metric=metric).values_list("used", flat=True)
+
+
+def get_usage_count(user_id, metric: str) -> int:
+    return _usage_counter(user_id, metric).first() or 0
+
+
+async def aget_usage_count(user_id, metric: str) -> int:
+    return await _usage_counter(user_id, metric).afirst() or 0
+
+
+def get_usage_rollup_count(user_id, metric: str, granularity: str, period_start) -> int:
+    return (
+        SubscriptionUsageRollup.objects.filter(
+            user_id=user_id, metric=metric, granularity=granularity, period_start=period_start
+        )
+        .values_list("count", flat=True)
+        .first()
+        or 0
+    )
+
+
+def due_subscriptions(now, after=None):
+    qs = UserSubscription.objects.filter(status=SubscriptionStatus.ACTIVE, current_period_end__lte=now)
+    if after is not None:
+        end, pk = after
+        qs = qs.filter(Q(current_period_end__gt=end) | Q(current_period_end=end, pk__gt=pk))
+    return qs.order_by("current_period_end", "pk")
 
 
 def get_featured_credit_balance(subscription: UserSubscription) -> int:
-    total = (
-        SubscriptionCreditLedger.objects.filter(
-            subscription=subscription, credit_type=SubscriptionCreditLedger.CreditType.FEATURED
-        ).aggregate(total=Sum("change"))
-    )["total"]
-    return total or 0
+    return _featured_balance(subscription).first() or 0
+
+
+async def aget_featured_credit_balance(subscription: UserSubscription) -> int:
+    return await _featured_balance(subscription).afirst() or 0
+
+
+def get_featured_credit_balances(subscription_ids) -> dict:
+    return dict(
+        SubscriptionCreditBalance.objects.filter(
+            subscription_id__in=subscription_ids,
+            credit_type=SubscriptionCreditLedger.CreditType.FEATURED,
+        ).values_list("subscription_id", "balance")
+    )
+
+
+def get_latest_credit_checkpoints(subscription_ids=None, credit_type=None) -> dict:
+    checkpoints = {}
+    qs = SubscriptionCreditCheckpoint.objects.all()
+    if subscription_ids is not None:
+        qs = qs.filter(subscription_id__in=subscription_ids)
+    if credit_type is not None:
+        qs = qs.filter(credit_type=credit_type)
+    for checkpoint in qs.order_by("subscription_id", "credit_type", "-covers_until"):
+        checkpoints.setdefault((checkpoint.subscription_id, checkpoint.credit_type), checkpoint)
+    return checkpoints
+
+
+def get_featured_credit_ledger_total(subscription: UserSubscription) -> int:
+    credit_type = SubscriptionCreditLedger.CreditType.FEATURED
+    checkpoint = get_latest_credit_checkpoints([subscription.pk], credit_type).get((subscription.pk, credit_type))
+    entries = SubscriptionCreditLedger.objects.filter(subscription=subscription, credit_type=credit_type)
+    if checkpoint:
+        entries = entries.filter(created_at__gt=checkpoint.covers_until)
+    total = entries.aggregate(total=Sum("change"))["total"]
+    return (checkpoint.balance if checkpoint else 0) + (total or 0)
+
+
+def get_subscription_events(after: int = 0, *, limit: int = 500, event_types=None) -> list[SubscriptionEvent]:
+    """Return up to ``limit`` outbox events with an id greater than ``after``, oldest first."""
+    qs = SubscriptionEvent.objects.filter(id__gt=after)
+    if event_types:
+        qs = qs.filter(event_type__in=list(event_types))
+    return list(qs.order_by("id")[:limit])
+
+
+def get_subscription_events_in_ranges(ranges, *, limit: int = 500) -> list[SubscriptionEvent]:
+    """Return up to ``limit`` outbox events whose id lies in one of the ``(first, last)`` ranges, oldest first."""
+    if not ranges:
+        return []
+    condition = Q()
+    for first, last in ranges:
+        condition |= Q(id__range=(first, last))
+    return list(SubscriptionEvent.objects.filter(condition).order_by("id")[:limit])
+
+
+def get_latest_subscription_event_id() -> int:
+    return SubscriptionEvent.objects.aggregate(latest=Max("id"))["latest"] or 0
+
+
+def get_subscription_boundaries(start, end, subscription_ids=None) -> tuple[list, list]:
+    """Return ``(period_ends, period_starts)`` of active subscriptions falling in ``(start, end]``.
+
+    Each list holds ``(moment, subscription_id)`` pairs; period starts are limited to plans
+    that grant featured credits.
+    """
+    active = UserSubscription.objects.filter(status=SubscriptionStatus.ACTIVE)
+    if subscription_ids is not None:
+        active = active.filter(pk__in=list(subscription_ids))
+    ends = active.filter(current_period_end__gt=start, current_period_end__lte=end).values_list(
+        "current_period_end", "pk"
+    )
+    starts = active.filter(
+        current_period_start__gt=start,
+        current_period_start__lte=end,
+        plan__featured_credits_per_period__gt=0,
+    ).values_list("current_period_start", "pk")
+    return list(ends.order_by()), list(starts.order_by())
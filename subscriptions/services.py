@@ -1,22 +1,55 @@
 from __future__ import annotations
 
+import time
+import traceback
 import uuid
-from datetime import timedelta
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from types import SimpleNamespace
 
+from django.db import IntegrityError, connections, router
 from django.db import transaction as db_transaction
+from django.db.models import Exists, F, OuterRef, QuerySet, Sum
 from django.utils import timezone
 
+from . import cache as entitlement_cache
+from . import catalog, idempotency, memo, routers
+from .metrics import instrument, set_outcome
+from .conf import (
+    archive_batch_size,
+    entitlement_snapshots_enabled,
+    event_batch_size,
+    event_gap_retention_seconds,
+    event_settle_seconds,
+    expiry_batch_size,
+    grant_batch_size,
+    inbox_batch_size,
+    inbox_lease_seconds,
+    inbox_max_attempts,
+    inbox_retry_backoff,
+)
 from .models import (
     ProcessedSubscriptionOrder,
+    SubscriptionCreditBalance,
+    SubscriptionCreditCheckpoint,
     SubscriptionCreditLedger,
-    SubscriptionProduct,
+    SubscriptionCreditLedgerArchive,
+    SubscriptionEvent,
+    SubscriptionEventCursor,
+    SubscriptionInboxMessage,
     SubscriptionStatus,
+    UserEntitlementSnapshot,
     UserSubscription,
 )
 from .selectors import (
+    due_subscriptions,
     get_active_subscription_for_user,
-    get_featured_credit_balance,
-    get_subscription_product_by_sku,
+    get_active_subscriptions_for_users,
+    get_featured_credit_balances,
+    get_latest_credit_checkpoints,
+    get_subscription_events,
+    get_subscription_events_in_ranges,
 )
 
 
@@ -36,132 +69,1005 @@ def _extract_order_reference(order, item) -> str:
     return ""
 
 
+@instrument
+def subscriptions_changed(user_ids) -> None:
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    for user_id in user_ids:
+        memo.invalidate(user_id)
+    if entitlement_snapshots_enabled():
+        pending = _pending_snapshots.get()
+        if pending is None:
+            refresh_entitlement_snapshots(user_ids)
+        else:
+            pending.update(user_ids)
+    if routers.is_enabled():
+        # Read these users from the primary until the replica has caught up with this write.
+        routers.pin_to_primary(user_ids)
+        db_transaction.on_commit(lambda: routers.pin_to_primary(user_ids))
+    if entitlement_cache.is_enabled():
+        # Bump now so this worker stops serving stale entries, and again after commit
+        # so a reader that saw pre-commit rows cannot have cached them under the new version.
+        entitlement_cache.bump(user_ids)
+        db_transaction.on_commit(lambda: entitlement_cache.bump(user_ids))
+
+
+_pending_snapshots: ContextVar[set | None] = ContextVar("subscriptions_pending_snapshots", default=None)
+
+SNAPSHOT_FIELDS = [
+    "subscription",
+    "plan_key",
+    "max_active_listings",
+    "badge_label",
+    "priority_support",
+    "featured_credits_balance",
+    "valid_until",
+    "updated_at",
+]
+
+
+@contextmanager
+def _coalesce_snapshot_refresh():
+    """Refresh each touched user's snapshot once, when the block finishes without an error."""
+    if not entitlement_snapshots_enabled() or _pending_snapshots.get() is not None:
+        yield
+        return
+    pending = set()
+    token = _pending_snapshots.set(pending)
+    try:
+        yield
+    finally:
+        _pending_snapshots.reset(token)
+    refresh_entitlement_snapshots(pending)
+
+
+def _snapshot_row(user_id, subscription, balances) -> UserEntitlementSnapshot:
+    if subscription is None:
+        return UserEntitlementSnapshot(user_id=user_id)
+    plan = subscription.plan
+    return UserEntitlementSnapshot(
+        user_id=user_id,
+        subscription_id=subscription.pk,
+        plan_key=plan.key,
+        max_active_listings=plan.max_active_listings,
+        badge_label=plan.badge_label,
+        priority_support=plan.priority_support,
+        featured_credits_balance=balances.get(subscription.pk, 0),
+        valid_until=subscription.current_period_end,
+    )
+
+
+@instrument
+def refresh_entitlement_snapshots(user_ids, now=None) -> int:
+    """Recompute the ``UserEntitlementSnapshot`` rows of ``user_ids`` from the live tables.
+
+    Call inside the transaction that changed them so the snapshot commits with the change.
+    """
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if not user_ids:
+        return 0
+    now = now or timezone.now()
+    with routers.primary_reads():
+        subscriptions = get_active_subscriptions_for_users(user_ids, now=now)
+        balances = (
+            get_featured_credit_balances([subscription.pk for subscription in subscriptions.values()])
+            if subscriptions
+            else {}
+        )
+    connection = connections[router.db_for_write(UserEntitlementSnapshot)]
+    UserEntitlementSnapshot.objects.bulk_create(
+        [_snapshot_row(user_id, subscriptions.get(user_id), balances) for user_id in user_ids],
+        update_conflicts=True,
+        unique_fields=["user"] if connection.features.supports_update_conflicts_with_target else None,
+        update_fields=SNAPSHOT_FIELDS,
+    )
+    return len(user_ids)
+
+
+@instrument
+def update_plan_entitlement_snapshots(plan) -> int:
+    """Copy ``plan``'s current limits into the snapshots of users subscribed to it."""
+    return UserEntitlementSnapshot.objects.filter(subscription__plan=plan).update(
+        plan_key=plan.key,
+        max_active_listings=plan.max_active_listings,
+        badge_label=plan.badge_label,
+        priority_support=plan.priority_support,
+        updated_at=timezone.now(),
+    )
+
+
+@instrument
+def rebuild_entitlement_snapshots(*, batch_size: int = 1000) -> int:
+    """Recompute every snapshot, ``batch_size`` users per transaction; returns the rows written."""
+    written, last = 0, None
+    while True:
+        user_ids = UserSubscription.objects.order_by("user_id").values_list("user_id", flat=True).distinct()
+        if last is not None:
+            user_ids = user_ids.filter(user_id__gt=last)
+        user_ids = list(user_ids[:batch_size])
+        if not user_ids:
+            break
+        with db_transaction.atomic():
+            written += refresh_entitlement_snapshots(user_ids)
+        last = user_ids[-1]
+    UserEntitlementSnapshot.objects.exclude(user_id__in=UserSubscription.objects.values("user_id")).delete()
+    return written
+
+
+def _event(event_type: str, user_id, subscription_id=None, **payload) -> SubscriptionEvent:
+    return SubscriptionEvent(event_type=event_type, user_id=user_id, subscription_id=subscription_id, payload=payload)
+
+
+def _record_events(events) -> None:
+    """Append outbox events; call inside the transaction that makes the change they describe."""
+    if events:
+        SubscriptionEvent.objects.bulk_create(events)
+
+
+@instrument
+def consume_subscription_events(consumer: str, handler, *, batch_size: int | None = None, now=None) -> int:
+    """Pass the next batch of events after ``consumer``'s cursor to ``handler`` and advance the cursor.
+
+    The cursor row stays locked while ``handler`` runs, so drains of one consumer never
+    overlap. If ``handler`` raises, the cursor does not move and the batch is delivered
+    again. Events that commit into a gap the cursor has already passed are delivered
+    first, out of id order. Returns the number of events handled.
+    """
+    now = now or timezone.now()
+    limit = batch_size or event_batch_size()
+    with db_transaction.atomic():
+        SubscriptionEventCursor.objects.bulk_create([SubscriptionEventCursor(consumer=consumer)], ignore_conflicts=True)
+        cursor = SubscriptionEventCursor.objects.select_for_update().get(consumer=consumer)
+        retained_since = now.timestamp() - event_gap_retention_seconds()
+        gaps = [gap for gap in cursor.gaps if gap[2] >= retained_since]
+        late = get_subscription_events_in_ranges([gap[:2] for gap in gaps], limit=limit)
+        events = []
+        if len(late) < limit:
+            events = _settled_events(
+                get_subscription_events(cursor.position, limit=limit - len(late)), cursor.position, now
+            )
+        gaps = _fill_gaps(gaps, [event.id for event in late]) + _new_gaps(events, cursor.position, now.timestamp())
+        if not late and not events:
+            if gaps != cursor.gaps:
+                cursor.gaps = gaps
+                cursor.save(update_fields=["gaps", "updated_at"])
+            return 0
+        handler(late + events)
+        if events:
+            cursor.position = events[-1].id
+        cursor.gaps = gaps
+        cursor.save(update_fields=["position", "gaps", "updated_at"])
+    return len(late) + len(events)
+
+
+def _settled_events(events, after: int, now) -> list:
+    # Ids are allocated at INSERT but become visible at COMMIT, so a recent gap may be an
+    # event still in flight. Stop before it to keep delivery in id order; older gaps are
+    # passed and remembered on the cursor in case a long transaction fills them later.
+    settle_before = now - timedelta(seconds=event_settle_seconds())
+    # A new consumer has no previous event to measure the first gap from.
+    expected = after + 1 if after else (events[0].id if events else None)
+    for index, event in enumerate(events):
+        if event.id != expected and event.created_at > settle_before:
+            return events[:index]
+        expected = event.id + 1
+    return events
+
+
+def _new_gaps(events, after: int, seen_at: float) -> list:
+    gaps = []
+    expected = after + 1 if after else None
+    for event in events:
+        if expected is not None and event.id > expected:
+            gaps.append([expected, event.id - 1, seen_at])
+        expected = event.id + 1
+    return gaps
+
+
+def _fill_gaps(gaps, ids) -> list:
+    """Split the ``[first, last, seen_at]`` ranges around the delivered ``ids``."""
+    remaining = []
+    ids = sorted(ids)
+    for first, last, seen_at in gaps:
+        for event_id in ids:
+            if first <= event_id <= last:
+                if event_id > first:
+                    remaining.append([first, event_id - 1, seen_at])
+                first = event_id + 1
+        if first <= last:
+            remaining.append([first, last, seen_at])
+    return remaining
+
+
+def _apply_credit_change(subscription: UserSubscription, credit_type: str, change: int) -> None:
+    balances = SubscriptionCreditBalance.objects.filter(subscription=subscription, credit_type=credit_type)
+    if balances.update(balance=F("balance") + change):
+        return
+    try:
+        with db_transaction.atomic():
+            SubscriptionCreditBalance.objects.create(
+                subscription=subscription, credit_type=credit_type, balance=change
+            )
+    except IntegrityError:
+        # A concurrent writer created the row between our UPDATE and INSERT.
+        balances.update(balance=F("balance") + change)
+
+
+def _apply_credit_changes(credit_type: str, changes: dict) -> None:
+    """Add ``changes[subscription_id]`` to each balance with one UPDATE per distinct amount."""
+    if not changes:
+        return
+    SubscriptionCreditBalance.objects.bulk_create(
+        [
+            SubscriptionCreditBalance(subscription_id=subscription_id, credit_type=credit_type, balance=0)
+            for subscription_id in changes
+        ],
+        ignore_conflicts=True,
+    )
+    by_amount = {}
+    for subscription_id, change in changes.items():
+        by_amount.setdefault(change, []).append(subscription_id)
+    for change, subscription_ids in by_amount.items():
+        SubscriptionCreditBalance.objects.filter(
+            subscription_id__in=subscription_ids, credit_type=credit_type
+        ).update(balance=F("balance") + change)
+
+
+@instrument
 def grant_featured_credits(subscription: UserSubscription, *, reason: str, order_reference: str | None = None):
     credits = subscription.plan.featured_credits_per_period
     if credits and credits > 0:
-        SubscriptionCreditLedger.objects.create(
-            user=subscription.user,
-            subscription=subscription,
-            credit_type=SubscriptionCreditLedger.CreditType.FEATURED,
-            change=credits,
-            reason=reason,
-            related_order_reference=order_reference,
+        with db_transaction.atomic():
+            SubscriptionCreditLedger.objects.create(
+                user=subscription.user,
+                subscription=subscription,
+                credit_type=SubscriptionCreditLedger.CreditType.FEATURED,
+                change=credits,
+                reason=reason,
+                related_order_reference=order_reference,
+            )
+            _apply_credit_change(subscription, SubscriptionCreditLedger.CreditType.FEATURED, credits)
+            _record_events(
+                [
+                    _event(
+                        SubscriptionEvent.EventType.CREDITS_GRANTED,
+                        subscription.user_id,
+                        subscription.pk,
+                        amount=credits,
+                        reason=reason,
+                        order_reference=order_reference,
+                    )
+                ]
+            )
+            subscriptions_changed([subscription.user_id])
+
+
+def _apply_product(user, product, order_reference: str, now, active_subscription) -> UserSubscription:
+    if active_subscription and active_subscription.plan_id == product.plan_id:
+        active_subscription.current_period_start = active_subscription.current_period_end
+        active_subscription.current_period_end = active_subscription.current_period_end + timedelta(
+            days=product.period_days
+        )
+        active_subscription.last_paid_order_reference = order_reference
+        active_subscription.status = SubscriptionStatus.ACTIVE
+        active_subscription.save(
+            update_fields=[
+                "current_period_start",
+                "current_period_end",
+                "last_paid_order_reference",
+                "status",
+                "updated_at",
+            ]
         )
+        return active_subscription
+
+    if active_subscription:
+        active_subscription.status = SubscriptionStatus.EXPIRED
+        active_subscription.save(update_fields=["status", "updated_at"])
+
+    return UserSubscription.objects.create(
+        user=user,
+        plan=product.plan,
+        status=SubscriptionStatus.ACTIVE,
+        started_at=now,
+        current_period_start=now,
+        current_period_end=now + timedelta(days=product.period_days),
+        cancelled_at=None,
+        last_paid_order_reference=order_reference,
+    )
+
+
+def _activation_outcome(product, active_subscription) -> str:
+    if not active_subscription:
+        return "activated"
+    return "renewed" if active_subscription.plan_id == product.plan_id else "plan_changed"
 
 
+def _activation_event(outcome: str, subscription: UserSubscription, previous, order_reference: str):
+    payload = {
+        "plan": subscription.plan.key,
+        "order_reference": order_reference,
+        "current_period_end": subscription.current_period_end,
+    }
+    if outcome == SubscriptionEvent.EventType.PLAN_CHANGED:
+        payload["previous_subscription_id"] = previous.pk
+        payload["previous_plan"] = previous.plan.key
+    return _event(outcome, subscription.user_id, subscription.pk, **payload)
+
+
+def _claim_order_references(claims) -> set:
+    """Insert idempotency rows first; a unique-constraint conflict means "already processed"."""
+    try:
+        with db_transaction.atomic():
+            ProcessedSubscriptionOrder.objects.bulk_create(claims)
+        claimed = {claim.order_reference for claim in claims}
+    except IntegrityError:
+        claimed = set()
+        if len(claims) > 1:
+            for claim in claims:
+                try:
+                    with db_transaction.atomic():
+                        ProcessedSubscriptionOrder.objects.create(
+                            order_reference=claim.order_reference, user_id=claim.user_id, plan_id=claim.plan_id
+                        )
+                    claimed.add(claim.order_reference)
+                except IntegrityError:
+                    pass
+    references = [claim.order_reference for claim in claims]
+    db_transaction.on_commit(lambda: idempotency.remember(references))
+    return claimed
+
+
+@instrument
 def activate_or_renew_subscription_from_order_item(order, transaction, item, user) -> UserSubscription | None:
-    sku = getattr(item, "sku", None) or getattr(item, "product_sku", None)
-    product = get_subscription_product_by_sku(sku) if sku else None
+    product = catalog.get_product(catalog.sku_from_item(item))
     if not product or not user:
         return None
 
     order_reference = _extract_order_reference(order, item) or str(uuid.uuid4())
     now = timezone.now()
 
-    with db_transaction.atomic():
-        if ProcessedSubscriptionOrder.objects.filter(order_reference=order_reference).exists():
+    with db_transaction.atomic(), _coalesce_snapshot_refresh():
+        claim = ProcessedSubscriptionOrder(order_reference=order_reference, user=user, plan=product.plan)
+        if not _claim_order_references([claim]):
+            set_outcome("duplicate")
             return get_active_subscription_for_user(user, now=now, for_update=True)
 
-        expire_due_subscriptions(now=now)
+        expire_due_subscriptions(now=now, user=user)
 
         active_subscription = get_active_subscription_for_user(user, now=now, for_update=True)
-        target_subscription: UserSubscription
+        outcome = _activation_outcome(product, active_subscription)
+        set_outcome(outcome)
+        target_subscription = _apply_product(user, product, order_reference, now, active_subscription)
+        _record_events([_activation_event(outcome, target_subscription, active_subscription, order_reference)])
+
+        grant_featured_credits(
+            target_subscription, reason="activation_grant", order_reference=order_reference
+        )
+        subscriptions_changed([user.pk])
+        return target_subscription
+
 
-        if active_subscription and active_subscription.plan_id == product.plan_id:
-            active_subscription.current_period_start = active_subscription.current_period_end
-            active_subscription.current_period_end = active_subscription.current_period_end + timedelta(
-                days=product.period_days
+@instrument
+def process_paid_order(order, transaction, items, user) -> list[UserSubscription]:
+    """Apply every subscription item of a paid order for ``user`` in a single transaction.
+
+    Items are applied in order with the same semantics as
+    :func:`activate_or_renew_subscription_from_order_item`; returns the subscription
+    each newly processed item resulted in. Orders recently seen by this process (or the
+    shared cache) return immediately without touching the database.
+    """
+    if not user:
+        return []
+    matched = []
+    for item in items or []:
+        product = catalog.get_product(catalog.sku_from_item(item))
+        if product:
+            matched.append((product, _extract_order_reference(order, item) or str(uuid.uuid4())))
+    if not matched:
+        return []
+
+    done = idempotency.recently_processed(reference for _, reference in matched)
+    matched = [(product, reference) for product, reference in matched if reference not in done]
+    if not matched:
+        set_outcome("duplicate")
+        return []
+
+    now = timezone.now()
+    with db_transaction.atomic(), _coalesce_snapshot_refresh():
+        claims = {}
+        for product, reference in matched:
+            claims.setdefault(
+                reference, ProcessedSubscriptionOrder(order_reference=reference, user=user, plan=product.plan)
             )
-            active_subscription.last_paid_order_reference = order_reference
-            active_subscription.status = SubscriptionStatus.ACTIVE
-            active_subscription.save(
-                update_fields=[
-                    "current_period_start",
-                    "current_period_end",
-                    "last_paid_order_reference",
-                    "status",
-                    "updated_at",
-                ]
+        claimed = _claim_order_references(list(claims.values()))
+        if not claimed:
+            set_outcome("duplicate")
+            return []
+
+        expire_due_subscriptions(now=now, user=user)
+        active_subscription = get_active_subscription_for_user(user, now=now, for_update=True)
+
+        results, grants, events = [], [], []
+        for product, order_reference in matched:
+            if order_reference not in claimed:
+                continue
+            claimed.discard(order_reference)
+            outcome = _activation_outcome(product, active_subscription)
+            set_outcome(outcome)
+            previous = active_subscription
+            active_subscription = _apply_product(user, product, order_reference, now, active_subscription)
+            events.append(_activation_event(outcome, active_subscription, previous, order_reference))
+            results.append(active_subscription)
+            credits = product.plan.featured_credits_per_period
+            if credits and credits > 0:
+                grants.append(
+                    SubscriptionCreditLedger(
+                        user=user,
+                        subscription=active_subscription,
+                        credit_type=SubscriptionCreditLedger.CreditType.FEATURED,
+                        change=credits,
+                        reason="activation_grant",
+                        related_order_reference=order_reference,
+                    )
+                )
+
+        SubscriptionCreditLedger.objects.bulk_create(grants)
+        totals = {}
+        for entry in grants:
+            totals[entry.subscription_id] = totals.get(entry.subscription_id, 0) + entry.change
+            events.append(
+                _event(
+                    SubscriptionEvent.EventType.CREDITS_GRANTED,
+                    user.pk,
+                    entry.subscription_id,
+                    amount=entry.change,
+                    reason=entry.reason,
+                    order_reference=entry.related_order_reference,
+                )
             )
-            target_subscription = active_subscription
-        else:
-            if active_subscription:
-                active_subscription.status = SubscriptionStatus.EXPIRED
-                active_subscription.save(update_fields=["status", "updated_at"])
-
-            target_subscription = UserSubscription.objects.create(
-                user=user,
-                plan=product.plan,
-                status=SubscriptionStatus.ACTIVE,
-                started_at=now,
-                current_period_start=now,
-                current_period_end=now + timedelta(days=product.period_days),
-                cancelled_at=None,
-                last_paid_order_reference=order_reference,
+        _apply_credit_changes(SubscriptionCreditLedger.CreditType.FEATURED, totals)
+        _record_events(events)
+
+        subscriptions_changed([user.pk])
+        return results
+
+
+@instrument
+def enqueue_paid_order(order, items, user) -> SubscriptionInboxMessage | None:
+    """Record the subscription SKUs of a paid order for the inbox worker.
+
+    Only a single INSERT runs in the caller's request; a repeated order reference is ignored.
+    """
+    if not user:
+        return None
+    skus = [sku for sku in (catalog.sku_from_item(item) for item in items or []) if catalog.get_product(sku)]
+    if not skus:
+        return None
+    message = SubscriptionInboxMessage(
+        order_reference=_extract_order_reference(order, None) or str(uuid.uuid4()), user=user, skus=skus
+    )
+    SubscriptionInboxMessage.objects.bulk_create([message], ignore_conflicts=True)
+    return message
+
+
+@instrument
+def claim_inbox_messages(now=None, *, batch_size: int | None = None) -> list[SubscriptionInboxMessage]:
+    """Lease up to ``batch_size`` due messages to this worker.
+
+    Rows held by another worker's claim are skipped. A message whose lease runs out
+    before it is settled becomes claimable again.
+    """
+    now = now or timezone.now()
+    with db_transaction.atomic():
+        messages = list(
+            SubscriptionInboxMessage.objects.filter(
+                status__in=[SubscriptionInboxMessage.Status.PENDING, SubscriptionInboxMessage.Status.PROCESSING],
+                available_at__lte=now,
             )
+            .select_for_update(skip_locked=True)
+            .order_by("available_at")[: batch_size or inbox_batch_size()]
+        )
+        if messages:
+            SubscriptionInboxMessage.objects.filter(pk__in=[message.pk for message in messages]).update(
+                status=SubscriptionInboxMessage.Status.PROCESSING,
+                available_at=now + timedelta(seconds=inbox_lease_seconds()),
+                attempts=F("attempts") + 1,
+            )
+    for message in messages:
+        message.attempts += 1
+    return messages
+
+
+@instrument
+def process_subscription_inbox(now=None, *, batch_size: int | None = None) -> tuple[int, int]:
+    """Claim one batch of inbox messages and apply them; returns ``(processed, failed)``."""
+    processed = failed = 0
+    for message in claim_inbox_messages(now, batch_size=batch_size):
+        # Settling is guarded by ``attempts`` so a worker whose lease expired cannot
+        # overwrite the outcome of the worker that re-claimed the message.
+        settled = SubscriptionInboxMessage.objects.filter(pk=message.pk, attempts=message.attempts)
+        try:
+            _apply_inbox_message(message)
+        except Exception:
+            failed += 1
+            settled.update(**_inbox_retry(message, traceback.format_exc()))
+        else:
+            processed += 1
+            settled.update(status=SubscriptionInboxMessage.Status.DONE, processed_at=timezone.now(), last_error="")
+    return processed, failed
+
+
+def _apply_inbox_message(message: SubscriptionInboxMessage) -> None:
+    order = SimpleNamespace(reference=message.order_reference, user=message.user)
+    for sku in message.skus:
+        activate_or_renew_subscription_from_order_item(order, None, SimpleNamespace(sku=sku), message.user)
+
+
+def _inbox_retry(message: SubscriptionInboxMessage, error: str) -> dict:
+    if message.attempts >= inbox_max_attempts():
+        return {"status": SubscriptionInboxMessage.Status.FAILED, "last_error": error}
+    delay = min(inbox_retry_backoff() * 2 ** (message.attempts - 1), 3600)
+    return {
+        "status": SubscriptionInboxMessage.Status.PENDING,
+        "available_at": timezone.now() + timedelta(seconds=delay),
+        "last_error": error,
+    }
+
+
+@instrument
+def expire_due_subscriptions(now=None, *, user=None) -> int:
+    now = now or timezone.now()
+    if user is None:
+        return sum(len(ids) for ids in iter_expire_due_subscriptions(now=now))
 
-        ProcessedSubscriptionOrder.objects.create(
-            order_reference=order_reference, user=user, plan=product.plan
+    with db_transaction.atomic():
+        # Locked so a concurrent expiry of the same rows waits, then sees them expired.
+        due = list(
+            UserSubscription.objects.select_for_update()
+            .filter(user=user, status=SubscriptionStatus.ACTIVE, current_period_end__lte=now)
+            .order_by("pk")
+            .values_list("pk", "user_id", "current_period_end")
         )
+        return _mark_expired(due) if due else 0
 
-        grant_featured_credits(
-            target_subscription, reason="activation_grant", order_reference=order_reference
+
+@instrument
+def expire_subscriptions(subscriptions) -> int:
+    """Expire the given active subscriptions now, whatever their period end."""
+    with db_transaction.atomic():
+        rows = list(
+            UserSubscription.objects.select_for_update()
+            .filter(pk__in=subscriptions.values("pk"), status=SubscriptionStatus.ACTIVE)
+            .order_by("pk")
+            .values_list("pk", "user_id", "current_period_end")
         )
-        return target_subscription
+        return _mark_expired(rows) if rows else 0
+
 
+def _mark_expired(rows) -> int:
+    # Callers lock ``rows`` and re-check their status, so each expiry emits its event once.
+    expired = UserSubscription.objects.filter(
+        pk__in=[pk for pk, _, _ in rows], status=SubscriptionStatus.ACTIVE
+    ).update(status=SubscriptionStatus.EXPIRED)
+    _record_events(
+        [
+            _event(SubscriptionEvent.EventType.EXPIRED, user_id, pk, current_period_end=period_end)
+            for pk, user_id, period_end in rows
+        ]
+    )
+    subscriptions_changed(user_id for _, user_id, _ in rows)
+    return expired
 
-def expire_due_subscriptions(now=None) -> int:
+
+def iter_expire_due_subscriptions(now=None, *, batch_size: int | None = None, time_budget: float | None = None):
+    """Expire overdue subscriptions in chunks ordered by ``current_period_end``.
+
+    Each chunk is its own short transaction; the ids it expired are yielded once it
+    commits. Rows locked by a concurrent renewal are skipped and left for the next run.
+    Stops early once ``time_budget`` seconds have elapsed.
+    """
     now = now or timezone.now()
+    batch_size = batch_size or expiry_batch_size()
+    deadline = time.monotonic() + time_budget if time_budget else None
+    cursor = None
+
+    while deadline is None or time.monotonic() < deadline:
+        with db_transaction.atomic():
+            rows = list(
+                due_subscriptions(now, after=cursor)
+                .select_for_update(skip_locked=True)
+                .values_list("pk", "user_id", "current_period_end")[:batch_size]
+            )
+            if not rows:
+                return
+            cursor = (rows[-1][2], rows[-1][0])
+            _mark_expired(rows)
+        yield [pk for pk, _, _ in rows]
+
+
+def _live_subscription(now):
     return UserSubscription.objects.filter(
-        status=SubscriptionStatus.ACTIVE, current_period_end__lte=now
-    ).update(status=SubscriptionStatus.EXPIRED)
+        pk=OuterRef("subscription_id"), status=SubscriptionStatus.ACTIVE, current_period_end__gt=now
+    )
+
+
+def _live_balance(subscription: UserSubscription, credit_type: str) -> int:
+    """The balance ``_debit_credits`` can draw on: 0 once the subscription is no longer live."""
+    return (
+        SubscriptionCreditBalance.objects.filter(
+            Exists(_live_subscription(timezone.now())), subscription_id=subscription.pk, credit_type=credit_type
+        )
+        .values_list("balance", flat=True)
+        .first()
+        or 0
+    )
+
+
+def _debit_credits(subscription: UserSubscription, credit_type: str, amount: int) -> bool:
+    # One conditional single-table UPDATE: the balance guard sits on the row being updated,
+    # so a concurrent debit is re-checked against the committed balance. Liveness is an
+    # EXISTS rather than a join, which Django would turn into ``id IN (SELECT ...)``.
+    return bool(
+        SubscriptionCreditBalance.objects.filter(
+            Exists(_live_subscription(timezone.now())),
+            subscription_id=subscription.pk,
+            credit_type=credit_type,
+            balance__gte=amount,
+        ).update(balance=F("balance") - amount)
+    )
 
 
+@instrument
 def consume_featured_credit(subscription: UserSubscription, *, listing_id=None, reason: str = "consume") -> bool:
+    consumed = bool(consume_featured_credits(subscription, [listing_id], reason=reason))
+    set_outcome("consumed" if consumed else "insufficient")
+    return consumed
+
+
+@instrument
+def consume_featured_credits(
+    subscription: UserSubscription, listing_ids, *, reason: str = "consume", allow_partial: bool = False
+) -> list:
+    """Debit one featured credit per listing id; returns the listing ids that were charged.
+
+    All-or-nothing by default. With ``allow_partial`` as many listings as the balance
+    covers are charged, in the order given.
+    """
+    listing_ids = list(listing_ids)
+    if not listing_ids:
+        return []
+    credit_type = SubscriptionCreditLedger.CreditType.FEATURED
+
     with db_transaction.atomic():
-        subscription = (
-            UserSubscription.objects.select_for_update()
-            .filter(pk=subscription.pk, status=SubscriptionStatus.ACTIVE)
-            .first()
+        amount = len(listing_ids)
+        while not _debit_credits(subscription, credit_type, amount):
+            if not allow_partial:
+                set_outcome("insufficient")
+                return []
+            # Retry with whatever the balance covers now; concurrent debits only shrink it, and
+            # a subscription that is no longer live has nothing to draw on.
+            amount = min(amount, _live_balance(subscription, credit_type))
+            if amount <= 0:
+                set_outcome("insufficient")
+                return []
+
+        charged = listing_ids[:amount]
+        set_outcome("consumed" if amount == len(listing_ids) else "partial")
+        _record_events(
+            [
+                _event(
+                    SubscriptionEvent.EventType.CREDITS_CONSUMED,
+                    subscription.user_id,
+                    subscription.pk,
+                    amount=amount,
+                    reason=reason,
+                    listing_ids=charged,
+                )
+            ]
+        )
+        SubscriptionCreditLedger.objects.bulk_create(
+            [
+                SubscriptionCreditLedger(
+                    user_id=subscription.user_id,
+                    subscription_id=subscription.pk,
+                    credit_type=credit_type,
+                    change=-1,
+                    reason=reason,
+                    related_listing_id=listing_id,
+                )
+                for listing_id in charged
+            ]
         )
-        if not subscription:
-            return False
+        subscriptions_changed([subscription.user_id])
+        return charged
 
-        balance = get_featured_credit_balance(subscription)
-        if balance <= 0:
-            return False
 
-        SubscriptionCreditLedger.objects.create(
-            user=subscription.user,
-            subscription=subscription,
-            credit_type=SubscriptionCreditLedger.CreditType.FEATURED,
-            change=-1,
-            reason=reason,
-            related_listing_id=listing_id,
-        )
-        return True
+@instrument
+def grant_featured_credits_bulk(
+    subscriptions,
+    *,
+    reason: str,
+    order_reference: str | None = None,
+    grant_period: str | None = None,
+    batch_size: int | None = None,
+) -> int:
+    """Grant each subscription its plan's featured credits in one transaction.
+
+    Same ledger entries as :func:`grant_featured_credits`, written with one
+    ``bulk_create`` per chunk of ``batch_size``. With ``grant_period`` set, subscriptions
+    already granted for that period are skipped. Returns the number of entries written.
+    """
+    batch_size = batch_size or grant_batch_size()
+    if isinstance(subscriptions, QuerySet):
+        subscriptions = subscriptions.select_related("plan").iterator(chunk_size=batch_size)
+    rows = (
+        (subscription.pk, subscription.user_id, subscription.plan.featured_credits_per_period)
+        for subscription in subscriptions
+    )
+    rows = (row for row in rows if row[2] and row[2] > 0)
 
+    created = 0
+    with db_transaction.atomic():
+        for chunk in _chunked(rows, batch_size):
+            if grant_period is None:
+                created += _write_grants(chunk, reason=reason, order_reference=order_reference, period=None)
+            else:
+                created += _grant_chunk(chunk, reason=reason, order_reference=order_reference, period=grant_period)
+    return created
 
-def grant_periodic_credits(now=None) -> int:
+
+@instrument
+def grant_periodic_credits(
+    now=None,
+    *,
+    batch_size: int | None = None,
+    dry_run: bool = False,
+    subscription_ids=None,
+    started_only: bool = False,
+) -> int:
     now = now or timezone.now()
-    today = now.date()
-    subscriptions = (
-        UserSubscription.objects.select_related("plan", "user")
-        .filter(
+    today = timezone.localdate(now)
+    period_start = timezone.make_aware(datetime.combine(today, datetime.min.time()))
+    period = today.isoformat()
+    reason = "monthly_grant"
+    batch_size = batch_size or grant_batch_size()
+
+    due = (
+        UserSubscription.objects.filter(
             status=SubscriptionStatus.ACTIVE,
-            current_period_start__date=today,
+            current_period_start__gte=period_start,
+            current_period_start__lt=period_start + timedelta(days=1),
             plan__featured_credits_per_period__gt=0,
         )
-        .all()
+        .exclude(
+            pk__in=SubscriptionCreditLedger.objects.filter(reason=reason, grant_period=period).values(
+                "subscription_id"
+            )
+        )
+        .order_by()
     )
+    if subscription_ids is not None:
+        due = due.filter(pk__in=list(subscription_ids))
+    if started_only:
+        due = due.filter(current_period_start__lte=now)
+    if dry_run:
+        return due.count()
 
+    due = due.select_related("plan").only("pk", "user", "plan__featured_credits_per_period")
     created = 0
-    for subscription in subscriptions:
-        existing_today = subscription.credit_entries.filter(
-            reason="monthly_grant", created_at__date=today
-        ).exists()
-        if existing_today:
-            continue
-        grant_featured_credits(subscription, reason="monthly_grant")
-        created += 1
+    # One transaction per chunk keeps lock times short on large tables.
+    for chunk in _chunked(due.iterator(chunk_size=batch_size), batch_size):
+        created += grant_featured_credits_bulk(chunk, reason=reason, grant_period=period, batch_size=batch_size)
     return created
+
+
+def _chunked(iterable, size: int):
+    chunk = []
+    for row in iterable:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _grant_chunk(rows, *, reason: str, order_reference: str | None, period: str) -> int:
+    try:
+        with db_transaction.atomic():
+            return _write_grants(rows, reason=reason, order_reference=order_reference, period=period)
+    except IntegrityError:
+        # A concurrent run granted part of this chunk; drop those rows and write the rest.
+        granted = set(
+            SubscriptionCreditLedger.objects.filter(
+                subscription_id__in=[pk for pk, _, _ in rows], reason=reason, grant_period=period
+            ).values_list("subscription_id", flat=True)
+        )
+        with db_transaction.atomic():
+            return _write_grants(
+                [row for row in rows if row[0] not in granted],
+                reason=reason,
+                order_reference=order_reference,
+                period=period,
+            )
+
+
+def _write_grants(rows, *, reason: str, order_reference: str | None, period: str | None) -> int:
+    SubscriptionCreditLedger.objects.bulk_create(
+        [
+            SubscriptionCreditLedger(
+                user_id=user_id,
+                subscription_id=subscription_id,
+                credit_type=SubscriptionCreditLedger.CreditType.FEATURED,
+                change=credits,
+                reason=reason,
+                related_order_reference=order_reference,
+                grant_period=period,
+            )
+            for subscription_id, user_id, credits in rows
+        ]
+    )
+    totals = {}
+    for subscription_id, _, credits in rows:
+        totals[subscription_id] = totals.get(subscription_id, 0) + credits
+    _apply_credit_changes(SubscriptionCreditLedger.CreditType.FEATURED, totals)
+    _record_events(
+        [
+            _event(
+                SubscriptionEvent.EventType.CREDITS_GRANTED,
+                user_id,
+                subscription_id,
+                amount=credits,
+                reason=reason,
+                order_reference=order_reference,
+                grant_period=period,
+            )
+            for subscription_id, user_id, credits in rows
+        ]
+    )
+    subscriptions_changed(user_id for _, user_id, _ in rows)
+    return len(rows)
+
+
+def _rebuild_balance_chunk(subscription_ids, *, check_only: bool) -> list[tuple]:
+    # Lock the balances first: a consume updates its balance before writing the ledger and a
+    # grant writes the ledger before its balance, so once we hold these rows every ledger
+    # entry we can see is reflected in them, and none can be applied under us.
+    stored = {
+        (subscription_id, credit_type): balance
+        for subscription_id, credit_type, balance in SubscriptionCreditBalance.objects.select_for_update()
+        .filter(subscription_id__in=subscription_ids)
+        .order_by("pk")
+        .values_list("subscription_id", "credit_type", "balance")
+    }
+    # Archival holds these same locks while it writes a checkpoint and moves the entries it
+    # covers out of the hot ledger, so checkpoint + hot ledger is the full history here.
+    expected = {
+        key: checkpoint.balance for key, checkpoint in get_latest_credit_checkpoints(subscription_ids).items()
+    }
+    for row in (
+        SubscriptionCreditLedger.objects.filter(subscription_id__in=subscription_ids)
+        .values("subscription_id", "credit_type")
+        .annotate(total=Sum("change"))
+        .order_by()
+    ):
+        key = (row["subscription_id"], row["credit_type"])
+        expected[key] = expected.get(key, 0) + (row["total"] or 0)
+
+    mismatches = [
+        (key[0], key[1], stored.get(key), expected.get(key, 0))
+        for key in expected.keys() | stored.keys()
+        if expected.get(key, 0) != stored.get(key)
+    ]
+    if check_only:
+        return mismatches
+
+    for subscription_id, credit_type, current, total in mismatches:
+        if current is not None:
+            SubscriptionCreditBalance.objects.filter(
+                subscription_id=subscription_id, credit_type=credit_type
+            ).update(balance=total)
+            continue
+        try:
+            with db_transaction.atomic():
+                SubscriptionCreditBalance.objects.create(
+                    subscription_id=subscription_id, credit_type=credit_type, balance=total
+                )
+        except IntegrityError:
+            # A concurrent grant created the row and applied its own change; leave it to the next run.
+            pass
+    if mismatches:
+        subscriptions_changed(
+            UserSubscription.objects.filter(pk__in={row[0] for row in mismatches}).values_list("user_id", flat=True)
+        )
+    return mismatches
+
+
+@instrument
+def rebuild_credit_balances(*, check_only: bool = False, batch_size: int = 500) -> list[tuple]:
+    """Compare materialized balances with the ledger; fix drift unless ``check_only``.
+
+    Works through subscriptions ``batch_size`` at a time, each chunk in its own short
+    transaction holding its balance rows locked, so it is safe to run while serving traffic.
+    Returns ``(subscription_id, credit_type, stored, expected)`` for every mismatch.
+    """
+    mismatches, last = [], None
+    while True:
+        subscription_ids = UserSubscription.objects.order_by("pk").values_list("pk", flat=True)
+        if last is not None:
+            subscription_ids = subscription_ids.filter(pk__gt=last)
+        subscription_ids = list(subscription_ids[:batch_size])
+        if not subscription_ids:
+            return mismatches
+        with db_transaction.atomic():
+            mismatches.extend(_rebuild_balance_chunk(subscription_ids, check_only=check_only))
+        last = subscription_ids[-1]
+
+
+@instrument
+def archive_credit_ledger(cutoff, *, batch_size: int | None = None, dry_run: bool = False) -> tuple[int, int]:
+    """Checkpoint balances at ``cutoff`` and move the entries they cover to the archive table.
+
+    Works through ``batch_size`` subscriptions per transaction and streams their entries
+    into the archive ``batch_size`` rows at a time. Returns ``(checkpoints_written, entries_archived)``.
+    """
+    batch_size = batch_size or archive_batch_size()
+    old_entries = SubscriptionCreditLedger.objects.filter(created_at__lte=cutoff)
+    if dry_run:
+        keys = old_entries.values("subscription_id", "credit_type").distinct().order_by()
+        return keys.count(), old_entries.count()
+
+    subscription_ids = old_entries.values_list("subscription_id", flat=True).distinct().order_by()
+    checkpoints = archived = 0
+    for chunk in _chunked(subscription_ids.iterator(chunk_size=batch_size), batch_size):
+        with db_transaction.atomic():
+            written, moved = _archive_subscriptions(chunk, cutoff, batch_size)
+        checkpoints += written
+        archived += moved
+    return checkpoints, archived
+
+
+def _archive_subscriptions(subscription_ids, cutoff, batch_size: int) -> tuple[int, int]:
+    # Take the balance locks in the order ``_rebuild_balance_chunk`` does, so a rebuild never
+    # reads the checkpoints before this commit and the ledger after it.
+    list(
+        SubscriptionCreditBalance.objects.select_for_update()
+        .filter(subscription_id__in=subscription_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    entries = SubscriptionCreditLedger.objects.filter(subscription_id__in=subscription_ids, created_at__lte=cutoff)
+    previous = get_latest_credit_checkpoints(subscription_ids)
+    checkpoints = []
+    for row in entries.values("subscription_id", "credit_type").annotate(total=Sum("change")).order_by():
+        key = (row["subscription_id"], row["credit_type"])
+        base = previous[key].balance if key in previous else 0
+        checkpoints.append(
+            SubscriptionCreditCheckpoint(
+                subscription_id=key[0], credit_type=key[1], balance=base + (row["total"] or 0), covers_until=cutoff
+            )
+        )
+    SubscriptionCreditCheckpoint.objects.bulk_create(checkpoints)
+
+    archived = 0
+    rows = (
+        SubscriptionCreditLedgerArchive(
+            id=entry.id,
+            user_id=entry.user_id,
+            subscription_id=entry.subscription_id,
+            credit_type=entry.credit_type,
+            change=entry.change,
+            reason=entry.reason,
+            related_order_reference=entry.related_order_reference,
+            related_listing_id=entry.related_listing_id,
+            grant_period=entry.grant_period,
+            created_at=entry.created_at,
+        )
+        for entry in entries.order_by().iterator(chunk_size=batch_size)
+    )
+    for chunk in _chunked(rows, batch_size):
+        archived += len(SubscriptionCreditLedgerArchive.objects.bulk_create(chunk))
+    entries.delete()
+    return len(checkpoints), archived
@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import django
+from asgiref.sync import sync_to_async
+from django.db import transaction as db_transaction
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver, Signal
 
-from .models import SubscriptionProduct
-from .services import activate_or_renew_subscription_from_order_item
+from . import cache as entitlement_cache
+from . import catalog, metering
+from .conf import async_order_receiver, entitlement_snapshots_enabled, order_inbox_enabled
+from .models import SubscriptionPlan, SubscriptionProduct
+from .services import enqueue_paid_order, process_paid_order, update_plan_entitlement_snapshots
 
 try:
     from payments.signals import order_paid  # type: ignore
@@ -11,12 +19,6 @@ except Exception:  # pragma: no cover - fallback when payments app is absent
     order_paid = Signal()
 
 
-def _sku_from_item(item):
-    if isinstance(item, dict):
-        return item.get("sku") or item.get("product_sku")
-    return getattr(item, "sku", None) or getattr(item, "product_sku", None)
-
-
 def _items_from_order(order):
     if order is None:
         return []
@@ -32,17 +34,63 @@ def _items_from_order(order):
     return []
 
 
-@receiver(order_paid)
 def on_order_paid(sender, order=None, transaction=None, **kwargs):
     user = getattr(order, "user", None) or kwargs.get("user")
     items = kwargs.get("items") or _items_from_order(order)
     if not user or not items:
         return
 
-    for item in items:
-        sku = _sku_from_item(item)
-        if not sku:
-            continue
-        if not SubscriptionProduct.objects.filter(sku=sku, is_active=True).exists():
-            continue
-        activate_or_renew_subscription_from_order_item(order, transaction, item, user)
+    if order_inbox_enabled():
+        enqueue_paid_order(order, items, user)
+        return
+    process_paid_order(order, transaction, items, user)
+
+
+async def aon_order_paid(sender, order=None, transaction=None, **kwargs):
+    user = getattr(order, "user", None) or kwargs.get("user")
+    items = kwargs.get("items") or _items_from_order(order)
+    if not user or not items:
+        return
+
+    if isinstance(items, (list, tuple)):
+        snapshot = await catalog.aget_catalog()
+        if not any(catalog.sku_from_item(item) in snapshot.products_by_sku for item in items):
+            return
+    if order_inbox_enabled():
+        await sync_to_async(enqueue_paid_order)(order, items, user)
+        return
+    # Activation needs a transaction and row locks, which the async ORM cannot provide.
+    await sync_to_async(process_paid_order)(order, transaction, items, user)
+
+
+if async_order_receiver() and django.VERSION >= (5, 0):
+    order_paid.connect(aon_order_paid, dispatch_uid="subscriptions.on_order_paid")
+else:
+    order_paid.connect(on_order_paid, dispatch_uid="subscriptions.on_order_paid")
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+@receiver(post_delete, sender=SubscriptionPlan)
+def on_plan_changed(sender, **kwargs):
+    entitlement_cache.bump_all()
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+def on_plan_saved(sender, instance, **kwargs):
+    if entitlement_snapshots_enabled():
+        update_plan_entitlement_snapshots(instance)
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+@receiver(post_delete, sender=SubscriptionPlan)
+@receiver(post_save, sender=SubscriptionProduct)
+@receiver(post_delete, sender=SubscriptionProduct)
+def on_catalog_changed(sender, **kwargs):
+    catalog.invalidate()
+    # Readers may have reloaded the uncommitted state in the meantime; drop it again once visible.
+    db_transaction.on_commit(catalog.invalidate)
+
+
+@receiver(request_finished, dispatch_uid="subscriptions.flush_usage")
+def on_request_finished(sender, **kwargs):
+    metering.flush_if_due()
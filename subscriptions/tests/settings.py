@@ -10,7 +10,18 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "subscriptions",
 ]
-DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+DATABASES = {
+    "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+    "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+}
+DATABASE_ROUTERS = ["subscriptions.routers.SubscriptionReadRouter"]
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "subscriptions": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "subscriptions-tests",
+    },
+}
 ROOT_URLCONF = "subscriptions.tests.urls"
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
@@ -0,0 +1,91 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from subscriptions.admin import EstimatedCountPaginator
+from subscriptions.models import SubscriptionCreditLedger, SubscriptionPlan, SubscriptionProduct
+from subscriptions.services import activate_or_renew_subscription_from_order_item
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(username="admin", password="pass")
+        self.client.force_login(self.admin)
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            featured_credits_per_period=3,
+        )
+        self.product = SubscriptionProduct.objects.create(sku="BUS_SUB_MONTH_PLUS", plan=self.plan, period_days=30)
+        self.subscribed = 0
+
+    def _subscribe(self, count):
+        for _ in range(count):
+            self.subscribed += 1
+            user = get_user_model().objects.create_user(username=f"dealer-{self.subscribed}")
+            activate_or_renew_subscription_from_order_item(
+                DummyOrder(reference=f"ORDER-{self.subscribed}", user=user), None, DummyItem(self.product.sku), user
+            )
+
+    def _changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(captured), response
+
+    def test_changelists_do_not_query_per_row(self):
+        for url in ("/admin/subscriptions/usersubscription/", "/admin/subscriptions/subscriptioncreditledger/"):
+            self._subscribe(2)
+            few, _ = self._changelist_queries(url)
+            self._subscribe(5)
+            many, _ = self._changelist_queries(url)
+            self.assertEqual(few, many, url)
+
+    def test_subscription_changelist_shows_balance(self):
+        self._subscribe(1)
+        _, response = self._changelist_queries("/admin/subscriptions/usersubscription/?o=5")
+        self.assertContains(response, '<td class="field-featured_balance">3</td>', html=True)
+
+    def test_search_uses_prefix_and_exact_matches(self):
+        self._subscribe(2)
+        _, response = self._changelist_queries("/admin/subscriptions/usersubscription/?q=dealer-")
+        self.assertEqual(response.context["cl"].result_count, 2)
+        _, response = self._changelist_queries("/admin/subscriptions/usersubscription/?q=ealer")
+        self.assertEqual(response.context["cl"].result_count, 0)
+        _, response = self._changelist_queries("/admin/subscriptions/subscriptioncreditledger/?q=ORDER-2")
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def test_unfiltered_large_tables_use_the_estimate(self):
+        queryset = SubscriptionCreditLedger.objects.all()
+        with mock.patch.object(EstimatedCountPaginator, "_estimated_rows", return_value=5_000_000):
+            with self.assertNumQueries(0):
+                self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 5_000_000)
+
+    def test_filtered_or_small_tables_count_exactly(self):
+        with mock.patch.object(EstimatedCountPaginator, "_estimated_rows", return_value=5_000_000) as estimate:
+            self.assertEqual(
+                EstimatedCountPaginator(SubscriptionCreditLedger.objects.filter(reason="consume"), 100).count, 0
+            )
+        estimate.assert_not_called()
+        with mock.patch.object(EstimatedCountPaginator, "_estimated_rows", return_value=10):
+            self.assertEqual(EstimatedCountPaginator(SubscriptionCreditLedger.objects.all(), 100).count, 0)
@@ -0,0 +1,110 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from subscriptions.models import (
+    SubscriptionCreditBalance,
+    SubscriptionCreditCheckpoint,
+    SubscriptionCreditLedger,
+    SubscriptionCreditLedgerArchive,
+    SubscriptionPlan,
+    SubscriptionProduct,
+)
+from subscriptions.selectors import get_featured_credit_balance, get_featured_credit_ledger_total
+from subscriptions.services import (
+    activate_or_renew_subscription_from_order_item,
+    consume_featured_credit,
+    rebuild_credit_balances,
+)
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class LedgerArchiveTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="business_basic",
+            name="Business Basic",
+            description="",
+            price_ttd=Decimal("199.00"),
+            billing_period="monthly",
+            featured_credits_per_period=5,
+        )
+        self.product = SubscriptionProduct.objects.create(
+            sku="BUS_SUB_MONTH_BASIC",
+            plan=self.plan,
+            period_days=30,
+        )
+        self.subscription = activate_or_renew_subscription_from_order_item(
+            DummyOrder(reference="ORDER-ARCHIVE", user=self.user), None, DummyItem(sku=self.product.sku), self.user
+        )
+        consume_featured_credit(self.subscription, reason="test")
+        SubscriptionCreditLedger.objects.update(created_at=timezone.now() - timedelta(days=200))
+        consume_featured_credit(self.subscription, reason="test")
+
+    def test_archive_checkpoints_and_moves_old_entries(self):
+        call_command("archive_credit_ledger", "--older-than-days", "90", stdout=StringIO())
+
+        checkpoint = SubscriptionCreditCheckpoint.objects.get(subscription=self.subscription)
+        self.assertEqual(checkpoint.balance, 4)
+        self.assertEqual(SubscriptionCreditLedger.objects.count(), 1)
+        self.assertEqual(SubscriptionCreditLedgerArchive.objects.count(), 2)
+        self.assertEqual(get_featured_credit_ledger_total(self.subscription), 3)
+        self.assertEqual(get_featured_credit_balance(self.subscription), 3)
+        self.assertEqual(rebuild_credit_balances(check_only=True), [])
+
+    def test_entries_are_archived_in_batches(self):
+        SubscriptionCreditLedger.objects.update(created_at=timezone.now() - timedelta(days=200))
+        table = SubscriptionCreditLedgerArchive._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            call_command("archive_credit_ledger", "--batch-size", "2", stdout=StringIO())
+
+        inserts = [query for query in queries if query["sql"].startswith(f'INSERT INTO "{table}"')]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(SubscriptionCreditLedgerArchive.objects.count(), 3)
+        self.assertFalse(SubscriptionCreditLedger.objects.exists())
+
+    def test_balances_are_locked_before_checkpointing(self):
+        balances = SubscriptionCreditBalance._meta.db_table
+        checkpoints = SubscriptionCreditCheckpoint._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            call_command("archive_credit_ledger", "--older-than-days", "90", stdout=StringIO())
+
+        sql = [query["sql"] for query in queries]
+        locked = next(index for index, text in enumerate(sql) if f'FROM "{balances}"' in text)
+        written = next(index for index, text in enumerate(sql) if text.startswith(f'INSERT INTO "{checkpoints}"'))
+        self.assertLess(locked, written)
+
+    def test_later_checkpoint_builds_on_previous_one(self):
+        call_command("archive_credit_ledger", "--older-than-days", "90", stdout=StringIO())
+        SubscriptionCreditLedger.objects.update(created_at=timezone.now() - timedelta(days=100))
+        call_command("archive_credit_ledger", "--older-than-days", "90", stdout=StringIO())
+
+        latest = SubscriptionCreditCheckpoint.objects.filter(subscription=self.subscription).first()
+        self.assertEqual(latest.balance, 3)
+        self.assertFalse(SubscriptionCreditLedger.objects.exists())
+        self.assertEqual(get_featured_credit_ledger_total(self.subscription), 3)
+
+    def test_dry_run_writes_nothing(self):
+        out = StringIO()
+        call_command("archive_credit_ledger", "--dry-run", stdout=out)
+
+        self.assertIn("Would write 1 checkpoint(s) and archive 2 ledger entries.", out.getvalue())
+        self.assertEqual(SubscriptionCreditLedger.objects.count(), 3)
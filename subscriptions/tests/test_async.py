@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from subscriptions.entitlements import (
+    acan_post_listing,
+    aconsume_featured_credit,
+    aget_active_subscription,
+    aget_entitlements,
+    get_entitlements,
+)
+from subscriptions.models import SubscriptionPlan, SubscriptionProduct, UserSubscription
+from subscriptions.signals import aon_order_paid
+
+
+class DummyOrder:
+    def __init__(self, reference, user, items):
+        self.reference = reference
+        self.user = user
+        self.items = items
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class AsyncEntitlementTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            featured_credits_per_period=1,
+            badge_label="Dealer",
+        )
+        self.product = SubscriptionProduct.objects.create(
+            sku="BUS_SUB_MONTH_PLUS",
+            plan=self.plan,
+            period_days=30,
+        )
+
+    async def test_async_receiver_and_entitlements(self):
+        self.assertIsNone(await aget_active_subscription(self.user))
+        self.assertEqual(await acan_post_listing(self.user), (False, "no_active_subscription"))
+
+        await aon_order_paid(None, order=DummyOrder("ORDER-SKIP", self.user, [DummyItem("TSHIRT")]))
+        self.assertFalse(await UserSubscription.objects.filter(user=self.user).aexists())
+
+        await aon_order_paid(None, order=DummyOrder("ORDER-ASYNC", self.user, [DummyItem(self.product.sku)]))
+
+        subscription = await aget_active_subscription(self.user)
+        self.assertEqual(subscription.plan.key, "dealer_plus")
+        entitlements = await aget_entitlements(self.user)
+        self.assertEqual(entitlements, await sync_to_async(get_entitlements)(self.user))
+        self.assertEqual(entitlements["featured_credits_balance"], 1)
+        self.assertEqual(await acan_post_listing(self.user), (True, "unlimited"))
+
+        self.assertTrue(await aconsume_featured_credit(self.user, reason="test"))
+        self.assertFalse(await aconsume_featured_credit(self.user, reason="test"))
+
@@ -0,0 +1,24 @@
+from django.test import TestCase
+
+from subscriptions.benchmarks import run_benchmarks
+
+
+class BenchmarkSmokeTests(TestCase):
+    def test_every_hot_path_is_reported(self):
+        results = run_benchmarks([3], iterations=2, ledger_rows=2, batch_iterations=1)
+
+        self.assertEqual(
+            [row["benchmark"] for row in results],
+            [
+                "get_entitlements",
+                "can_post_listing",
+                "consume_featured_credit",
+                "activate_or_renew_subscription_from_order_item",
+                "expire_due_subscriptions",
+                "grant_periodic_credits",
+            ],
+        )
+        for row in results:
+            self.assertEqual(row["size"], 3)
+            self.assertGreaterEqual(row["p99_ms"], row["p50_ms"])
+            self.assertGreater(row["queries_mean"], 0)
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from subscriptions.entitlements import get_entitlements_bulk, has_active_subscription_bulk
+from subscriptions.models import SubscriptionPlan, SubscriptionProduct
+from subscriptions.services import activate_or_renew_subscription_from_order_item
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class BulkEntitlementTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            featured_credits_per_period=2,
+            badge_label="Dealer",
+            max_active_listings=50,
+        )
+        self.product = SubscriptionProduct.objects.create(
+            sku="BUS_SUB_MONTH_PLUS",
+            plan=self.plan,
+            period_days=30,
+        )
+        self.subscribers = [User.objects.create_user(username=f"dealer{i}", password="pass") for i in range(5)]
+        for index, user in enumerate(self.subscribers):
+            activate_or_renew_subscription_from_order_item(
+                DummyOrder(reference=f"ORDER-BULK-{index}", user=user), None, DummyItem(sku=self.product.sku), user
+            )
+        self.free_user = User.objects.create_user(username="browser", password="pass")
+
+    def test_bulk_entitlements_use_constant_queries(self):
+        users = self.subscribers + [self.free_user]
+
+        with self.assertNumQueries(2):
+            entitlements = get_entitlements_bulk(users)
+
+        self.assertEqual(len(entitlements), 6)
+        for user in self.subscribers:
+            self.assertEqual(entitlements[user.pk]["badge_label"], "Dealer")
+            self.assertEqual(entitlements[user.pk]["featured_credits_balance"], 2)
+        self.assertEqual(entitlements[self.free_user.pk]["featured_credits_balance"], 0)
+        self.assertIsNone(entitlements[self.free_user.pk]["max_active_listings"])
+
+    def test_bulk_active_check_accepts_ids(self):
+        ids = [self.subscribers[0].pk, self.free_user.pk]
+
+        with self.assertNumQueries(1):
+            active = has_active_subscription_bulk(ids)
+
+        self.assertEqual(active, {self.subscribers[0].pk: True, self.free_user.pk: False})
+
+    def test_bulk_without_subscribers_skips_balance_query(self):
+        with self.assertNumQueries(1):
+            entitlements = get_entitlements_bulk([self.free_user])
+        self.assertEqual(entitlements[self.free_user.pk]["badge_label"], "")
@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from subscriptions import cache as entitlement_cache
+from subscriptions.entitlements import consume_featured_credit, get_entitlements, has_active_subscription
+from subscriptions.models import SubscriptionPlan, SubscriptionProduct
+from subscriptions.services import activate_or_renew_subscription_from_order_item, expire_due_subscriptions
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+@override_settings(SUBSCRIPTIONS_ENTITLEMENT_CACHE="subscriptions")
+class EntitlementCacheTests(TestCase):
+    def setUp(self):
+        caches["subscriptions"].clear()
+        entitlement_cache.reset_stats()
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            featured_credits_per_period=2,
+            badge_label="Dealer",
+        )
+        self.product = SubscriptionProduct.objects.create(
+            sku="BUS_SUB_MONTH_PLUS",
+            plan=self.plan,
+            period_days=30,
+        )
+        self.subscription = activate_or_renew_subscription_from_order_item(
+            DummyOrder(reference="ORDER-CACHE", user=self.user), None, DummyItem(sku=self.product.sku), self.user
+        )
+
+    def test_second_read_is_served_from_cache(self):
+        get_entitlements(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_entitlements(self.user)["featured_credits_balance"], 2)
+            self.assertTrue(has_active_subscription(self.user))
+        self.assertEqual(entitlement_cache.stats(), {"hits": 2, "misses": 1})
+
+    def test_writes_bump_the_user_version(self):
+        get_entitlements(self.user)
+        consume_featured_credit(self.user, reason="test")
+        self.assertEqual(get_entitlements(self.user)["featured_credits_balance"], 1)
+
+        self.subscription.current_period_end = self.subscription.current_period_start
+        self.subscription.save(update_fields=["current_period_end"])
+        expire_due_subscriptions()
+        self.assertFalse(has_active_subscription(self.user))
+
+    def test_plan_change_invalidates_all_entries(self):
+        get_entitlements(self.user)
+        self.plan.badge_label = "Top Dealer"
+        self.plan.save()
+        self.assertEqual(get_entitlements(self.user)["badge_label"], "Top Dealer")
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from subscriptions import catalog
+from subscriptions.models import SubscriptionPlan, SubscriptionProduct, UserSubscription
+from subscriptions.selectors import get_subscription_product_by_sku
+from subscriptions.signals import on_order_paid
+
+
+class DummyOrder:
+    def __init__(self, reference, user, items):
+        self.reference = reference
+        self.user = user
+        self.items = items
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class CatalogTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="business_basic",
+            name="Business Basic",
+            description="",
+            price_ttd=Decimal("199.00"),
+            billing_period="monthly",
+        )
+        self.product = SubscriptionProduct.objects.create(
+            sku="BUS_SUB_MONTH_BASIC",
+            plan=self.plan,
+            period_days=30,
+        )
+
+    def test_lookups_are_served_from_memory(self):
+        catalog.get_catalog()
+
+        with self.assertNumQueries(0):
+            product = catalog.get_product("BUS_SUB_MONTH_BASIC")
+            self.assertEqual(product.plan.key, "business_basic")
+            self.assertIs(catalog.get_plan("business_basic"), product.plan)
+            self.assertIsNone(catalog.get_product("UNKNOWN"))
+            self.assertIs(get_subscription_product_by_sku("BUS_SUB_MONTH_BASIC"), product)
+
+    def test_saving_a_product_invalidates_the_snapshot(self):
+        self.assertIsNotNone(catalog.get_product("BUS_SUB_MONTH_BASIC"))
+
+        self.product.is_active = False
+        self.product.save()
+
+        self.assertIsNone(catalog.get_product("BUS_SUB_MONTH_BASIC"))
+
+    @override_settings(SUBSCRIPTIONS_CATALOG_CACHE="subscriptions")
+    def test_shared_version_change_reloads_snapshot(self):
+        caches["subscriptions"].delete(catalog.VERSION_KEY)
+        first = catalog.get_catalog()
+        self.assertIs(catalog.get_catalog(), first)
+
+        caches["subscriptions"].set(catalog.VERSION_KEY, "other-process")
+
+        self.assertIsNot(catalog.get_catalog(), first)
+
+    def test_order_paid_ignores_non_subscription_skus_without_queries(self):
+        order = DummyOrder(reference="ORDER-CAT", user=self.user, items=[DummyItem("TSHIRT")])
+        catalog.get_catalog()
+
+        with self.assertNumQueries(0):
+            on_order_paid(sender=None, order=order)
+
+        order.items = [DummyItem("TSHIRT"), DummyItem("BUS_SUB_MONTH_BASIC")]
+        on_order_paid(sender=None, order=order)
+        self.assertTrue(UserSubscription.objects.filter(user=self.user, plan=self.plan).exists())
@@ -0,0 +1,98 @@
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from subscriptions.entitlements import consume_featured_credits, get_entitlements
+from subscriptions.models import SubscriptionCreditLedger, SubscriptionPlan, SubscriptionProduct, SubscriptionStatus
+from subscriptions.selectors import get_featured_credit_balance
+from subscriptions import services
+from subscriptions.services import activate_or_renew_subscription_from_order_item, consume_featured_credit
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class CreditConsumptionTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            featured_credits_per_period=3,
+        )
+        self.product = SubscriptionProduct.objects.create(
+            sku="BUS_SUB_MONTH_PLUS",
+            plan=self.plan,
+            period_days=30,
+        )
+        self.subscription = activate_or_renew_subscription_from_order_item(
+            DummyOrder(reference="ORDER-CONSUME", user=self.user), None, DummyItem(sku=self.product.sku), self.user
+        )
+        self.listings = [uuid.uuid4() for _ in range(5)]
+
+    def test_single_consume_is_one_conditional_update_and_one_insert(self):
+        # SAVEPOINT, UPDATE ... WHERE balance >= 1, ledger INSERT, outbox INSERT, RELEASE SAVEPOINT
+        with self.assertNumQueries(5):
+            self.assertTrue(consume_featured_credit(self.subscription, listing_id=self.listings[0]))
+        self.assertEqual(get_featured_credit_balance(self.subscription), 2)
+
+    def test_debit_guards_the_balance_on_the_updated_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            consume_featured_credit(self.subscription, listing_id=self.listings[0])
+
+        update = next(query["sql"] for query in queries if query["sql"].startswith("UPDATE"))
+        self.assertNotIn("IN (SELECT", update)
+        self.assertIn("EXISTS", update)
+        self.assertIn('"balance" >= 1', update)
+
+    def test_batch_is_all_or_nothing_by_default(self):
+        self.assertEqual(consume_featured_credits(self.user, self.listings), [])
+        self.assertEqual(get_entitlements(self.user)["featured_credits_balance"], 3)
+        self.assertFalse(SubscriptionCreditLedger.objects.filter(change__lt=0).exists())
+
+        self.assertEqual(consume_featured_credits(self.user, self.listings[:2]), self.listings[:2])
+        self.assertEqual(get_entitlements(self.user)["featured_credits_balance"], 1)
+
+    def test_partial_mode_charges_what_the_balance_covers(self):
+        charged = consume_featured_credits(self.user, self.listings, allow_partial=True)
+
+        self.assertEqual(charged, self.listings[:3])
+        self.assertEqual(get_featured_credit_balance(self.subscription), 0)
+        self.assertEqual(
+            set(SubscriptionCreditLedger.objects.filter(change=-1).values_list("related_listing_id", flat=True)),
+            set(self.listings[:3]),
+        )
+        self.assertEqual(consume_featured_credits(self.user, self.listings, allow_partial=True), [])
+
+    def test_overdue_subscription_cannot_consume(self):
+        self.subscription.current_period_end = timezone.now()
+        self.subscription.save(update_fields=["current_period_end"])
+
+        self.assertFalse(consume_featured_credit(self.subscription))
+        self.assertEqual(get_featured_credit_balance(self.subscription), 3)
+
+    def test_overdue_subscription_cannot_consume_partially(self):
+        self.subscription.current_period_end = timezone.now()
+        self.subscription.save(update_fields=["current_period_end"])
+
+        self.assertEqual(services.consume_featured_credits(self.subscription, [None, None], allow_partial=True), [])
+        self.subscription.status = SubscriptionStatus.EXPIRED
+        self.subscription.save(update_fields=["status"])
+        self.assertEqual(services.consume_featured_credits(self.subscription, [None], allow_partial=True), [])
+        self.assertEqual(get_featured_credit_balance(self.subscription), 3)
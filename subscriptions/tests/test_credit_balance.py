@@ -0,0 +1,73 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from subscriptions.models import (
+    SubscriptionCreditBalance,
+    SubscriptionCreditLedger,
+    SubscriptionPlan,
+    SubscriptionProduct,
+)
+from subscriptions.selectors import get_featured_credit_balance, get_featured_credit_ledger_total
+from subscriptions.services import activate_or_renew_subscription_from_order_item, consume_featured_credit
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class CreditBalanceTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="business_basic",
+            name="Business Basic",
+            description="",
+            price_ttd=Decimal("199.00"),
+            billing_period="monthly",
+            featured_credits_per_period=3,
+        )
+        self.product = SubscriptionProduct.objects.create(
+            sku="BUS_SUB_MONTH_BASIC",
+            plan=self.plan,
+            period_days=30,
+        )
+        order = DummyOrder(reference="ORDER-BALANCE", user=self.user)
+        self.subscription = activate_or_renew_subscription_from_order_item(
+            order, None, DummyItem(sku=self.product.sku), self.user
+        )
+
+    def test_balance_row_tracks_grants_and_consumption(self):
+        consume_featured_credit(self.subscription, reason="test")
+
+        balance = SubscriptionCreditBalance.objects.get(subscription=self.subscription)
+        self.assertEqual(balance.balance, 2)
+        self.assertEqual(get_featured_credit_balance(self.subscription), 2)
+        self.assertEqual(get_featured_credit_ledger_total(self.subscription), 2)
+
+    def test_rebuild_command_checks_and_repairs_drift(self):
+        SubscriptionCreditLedger.objects.create(
+            user=self.user,
+            subscription=self.subscription,
+            credit_type=SubscriptionCreditLedger.CreditType.FEATURED,
+            change=5,
+            reason="manual_fix",
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_credit_balances", "--check", stdout=StringIO())
+
+        call_command("rebuild_credit_balances", "--batch-size", "1", stdout=StringIO())
+        self.assertEqual(get_featured_credit_balance(self.subscription), 8)
+        call_command("rebuild_credit_balances", "--check", stdout=StringIO())
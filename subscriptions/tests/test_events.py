@@ -0,0 +1,181 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from subscriptions.models import (
+    SubscriptionEvent,
+    SubscriptionEventCursor,
+    SubscriptionPlan,
+    SubscriptionProduct,
+    UserSubscription,
+)
+from subscriptions.selectors import get_subscription_events
+from subscriptions.services import (
+    activate_or_renew_subscription_from_order_item,
+    consume_featured_credit,
+    consume_subscription_events,
+    expire_due_subscriptions,
+    expire_subscriptions,
+)
+
+Event = SubscriptionEvent.EventType
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class SubscriptionEventTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            featured_credits_per_period=2,
+        )
+        self.other_plan = SubscriptionPlan.objects.create(
+            key="dealer_pro", name="Dealer Pro", description="", price_ttd=Decimal("499.00"), billing_period="monthly"
+        )
+        SubscriptionProduct.objects.create(sku="BUS_SUB_MONTH_PLUS", plan=self.plan, period_days=30)
+        SubscriptionProduct.objects.create(sku="BUS_SUB_MONTH_PRO", plan=self.other_plan, period_days=30)
+
+    def _activate(self, reference, sku="BUS_SUB_MONTH_PLUS"):
+        return activate_or_renew_subscription_from_order_item(
+            DummyOrder(reference=reference, user=self.user), None, DummyItem(sku=sku), self.user
+        )
+
+    def _types(self):
+        return list(SubscriptionEvent.objects.values_list("event_type", flat=True))
+
+    def test_state_changes_write_events(self):
+        first = self._activate("ORDER-1")
+        self._activate("ORDER-2")
+        consume_featured_credit(first, reason="feature")
+        second = self._activate("ORDER-3", sku="BUS_SUB_MONTH_PRO")
+
+        self.assertEqual(
+            self._types(),
+            [
+                Event.ACTIVATED,
+                Event.CREDITS_GRANTED,
+                Event.RENEWED,
+                Event.CREDITS_GRANTED,
+                Event.CREDITS_CONSUMED,
+                Event.PLAN_CHANGED,
+            ],
+        )
+        plan_changed = SubscriptionEvent.objects.last()
+        self.assertEqual(plan_changed.subscription_id, second.pk)
+        self.assertEqual(plan_changed.payload["previous_subscription_id"], str(first.pk))
+        self.assertEqual(plan_changed.payload["order_reference"], "ORDER-3")
+
+    def test_bulk_expiry_writes_an_event_per_subscription(self):
+        subscription = self._activate("ORDER-1")
+        UserSubscription.objects.filter(pk=subscription.pk).update(current_period_end=timezone.now())
+        SubscriptionEvent.objects.all().delete()
+
+        self.assertEqual(expire_due_subscriptions(), 1)
+
+        event = SubscriptionEvent.objects.get()
+        self.assertEqual((event.event_type, event.subscription_id), (Event.EXPIRED, subscription.pk))
+
+    def test_repeated_expiry_writes_one_event(self):
+        subscription = self._activate("ORDER-1")
+        UserSubscription.objects.filter(pk=subscription.pk).update(current_period_end=timezone.now())
+
+        self.assertEqual(expire_due_subscriptions(user=self.user), 1)
+        self.assertEqual(expire_due_subscriptions(user=self.user), 0)
+        self.assertEqual(expire_subscriptions(UserSubscription.objects.filter(pk=subscription.pk)), 0)
+
+        self.assertEqual(SubscriptionEvent.objects.filter(event_type=Event.EXPIRED).count(), 1)
+
+    def test_cursor_advances_only_when_the_handler_succeeds(self):
+        self._activate("ORDER-1")
+        self._activate("ORDER-2")
+        batches = []
+
+        self.assertEqual(consume_subscription_events("search", batches.append, batch_size=3), 3)
+        self.assertEqual(consume_subscription_events("search", batches.append, batch_size=3), 1)
+        self.assertEqual(consume_subscription_events("search", batches.append, batch_size=3), 0)
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+
+        def failing(events):
+            raise RuntimeError("down")
+
+        self._activate("ORDER-3")
+        with self.assertRaises(RuntimeError):
+            consume_subscription_events("search", failing)
+        position = SubscriptionEventCursor.objects.get(consumer="search").position
+        self.assertEqual(get_subscription_events(position)[0].event_type, Event.RENEWED)
+
+    def test_recent_gaps_are_held_back(self):
+        self._activate("ORDER-1")
+        batches = []
+        self.assertEqual(consume_subscription_events("billing", batches.append), 2)
+        self._activate("ORDER-2")
+        renewed, granted = SubscriptionEvent.objects.filter(pk__gt=batches[0][-1].pk)
+        # Looks like an earlier transaction that has not committed yet.
+        renewed.delete()
+
+        self.assertEqual(consume_subscription_events("billing", batches.append), 0)
+        later = timezone.now() + timedelta(minutes=1)
+        self.assertEqual(consume_subscription_events("billing", batches.append, now=later), 1)
+        self.assertEqual(batches[-1][0].pk, granted.pk)
+
+    def test_events_committed_into_a_passed_gap_are_delivered_late(self):
+        self._activate("ORDER-1")
+        batches = []
+        consume_subscription_events("billing", batches.append)
+        self._activate("ORDER-2")
+        renewed = SubscriptionEvent.objects.filter(pk__gt=batches[0][-1].pk).first()
+        renewed_id = renewed.pk
+        renewed.delete()
+        later = timezone.now() + timedelta(minutes=1)
+        self.assertEqual(consume_subscription_events("billing", batches.append, now=later), 1)
+
+        # The long transaction commits after the cursor moved past its id.
+        renewed.pk = renewed_id
+        SubscriptionEvent.objects.bulk_create([renewed])
+        self.assertEqual(consume_subscription_events("billing", batches.append, now=later), 1)
+        self.assertEqual(batches[-1], [renewed])
+        self.assertEqual(consume_subscription_events("billing", batches.append, now=later), 0)
+        self.assertEqual(SubscriptionEventCursor.objects.get(consumer="billing").gaps, [])
+
+    def test_gaps_are_forgotten_after_the_retention_window(self):
+        self._activate("ORDER-1")
+        batches = []
+        consume_subscription_events("billing", batches.append)
+        self._activate("ORDER-2")
+        SubscriptionEvent.objects.filter(pk__gt=batches[0][-1].pk).first().delete()
+        consume_subscription_events("billing", batches.append, now=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(len(SubscriptionEventCursor.objects.get(consumer="billing").gaps), 1)
+
+        consume_subscription_events("billing", batches.append, now=timezone.now() + timedelta(days=2))
+        self.assertEqual(SubscriptionEventCursor.objects.get(consumer="billing").gaps, [])
+
+    def test_drain_command_prints_json_lines(self):
+        self._activate("ORDER-1")
+        out = StringIO()
+
+        call_command("drain_subscription_events", "--consumer", "cli", stdout=out, stderr=StringIO())
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line["event_type"] for line in lines], [Event.ACTIVATED, Event.CREDITS_GRANTED])
+        self.assertEqual(lines[0]["payload"]["plan"], "dealer_plus")
+        self.assertEqual(get_subscription_events(lines[-1]["id"]), [])
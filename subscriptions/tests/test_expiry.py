@@ -1,13 +1,15 @@
 from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 from django.utils import timezone
 
 from subscriptions.entitlements import has_active_subscription
 from subscriptions.models import SubscriptionPlan, SubscriptionProduct, SubscriptionStatus, UserSubscription
-from subscriptions.services import expire_due_subscriptions
+from subscriptions.services import expire_due_subscriptions, iter_expire_due_subscriptions
 
 
 class ExpiryTests(TestCase):
@@ -42,3 +44,60 @@ class ExpiryTests(TestCase):
 
         self.assertEqual(subscription.status, SubscriptionStatus.EXPIRED)
         self.assertFalse(has_active_subscription(self.user))
+
+    def test_reads_treat_overdue_subscription_as_expired_without_writing(self):
+        now = timezone.now()
+        subscription = UserSubscription.objects.create(
+            user=self.user,
+            plan=self.plan,
+            status=SubscriptionStatus.ACTIVE,
+            started_at=now - timedelta(days=40),
+            current_period_start=now - timedelta(days=40),
+            current_period_end=now - timedelta(days=10),
+        )
+
+        self.assertFalse(has_active_subscription(self.user))
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.status, SubscriptionStatus.ACTIVE)
+
+        with self.settings(SUBSCRIPTIONS_EXPIRE_ON_READ=True):
+            self.assertFalse(has_active_subscription(self.user))
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.status, SubscriptionStatus.EXPIRED)
+
+    def _overdue_subscriptions(self, count):
+        now = timezone.now()
+        User = get_user_model()
+        subscriptions = []
+        for index in range(count):
+            user = User.objects.create_user(username=f"overdue{index}", password="pass")
+            subscriptions.append(
+                UserSubscription.objects.create(
+                    user=user,
+                    plan=self.plan,
+                    status=SubscriptionStatus.ACTIVE,
+                    started_at=now - timedelta(days=40),
+                    current_period_start=now - timedelta(days=40),
+                    current_period_end=now - timedelta(days=10, minutes=index),
+                )
+            )
+        return subscriptions
+
+    def test_batched_expiry_yields_ids_per_chunk(self):
+        subscriptions = self._overdue_subscriptions(5)
+
+        batches = list(iter_expire_due_subscriptions(batch_size=2))
+
+        self.assertEqual([len(ids) for ids in batches], [2, 2, 1])
+        oldest_first = sorted(subscriptions, key=lambda subscription: subscription.current_period_end)
+        self.assertEqual(batches[0], [oldest_first[0].pk, oldest_first[1].pk])
+        self.assertFalse(UserSubscription.objects.filter(status=SubscriptionStatus.ACTIVE).exists())
+
+    def test_expire_subscriptions_command_reports_progress(self):
+        self._overdue_subscriptions(3)
+        out = StringIO()
+
+        call_command("expire_subscriptions", "--batch-size", "2", stdout=out)
+
+        self.assertIn("Batch 2: expired 1 subscription(s) (3 total).", out.getvalue())
+        self.assertIn("Expired 3 subscription(s).", out.getvalue())
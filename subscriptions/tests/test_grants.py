@@ -0,0 +1,133 @@
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase
+from django.utils import timezone
+
+from subscriptions.models import (
+    SubscriptionCreditLedger,
+    SubscriptionPlan,
+    SubscriptionStatus,
+    UserSubscription,
+)
+from subscriptions.selectors import get_featured_credit_balance
+from subscriptions.services import grant_featured_credits_bulk, grant_periodic_credits
+
+
+class PeriodicGrantTests(TestCase):
+    def setUp(self):
+        self.plan = SubscriptionPlan.objects.create(
+            key="business_basic",
+            name="Business Basic",
+            description="",
+            price_ttd=Decimal("199.00"),
+            billing_period="monthly",
+            featured_credits_per_period=3,
+        )
+        now = timezone.now()
+        User = get_user_model()
+        self.subscriptions = [
+            UserSubscription.objects.create(
+                user=User.objects.create_user(username=f"dealer{index}", password="pass"),
+                plan=self.plan,
+                status=SubscriptionStatus.ACTIVE,
+                started_at=now - timedelta(days=30),
+                current_period_start=now,
+                current_period_end=now + timedelta(days=30),
+            )
+            for index in range(5)
+        ]
+        UserSubscription.objects.create(
+            user=User.objects.create_user(username="midcycle", password="pass"),
+            plan=self.plan,
+            status=SubscriptionStatus.ACTIVE,
+            started_at=now - timedelta(days=10),
+            current_period_start=now - timedelta(days=10),
+            current_period_end=now + timedelta(days=20),
+        )
+
+    def test_grants_stream_in_chunks_and_are_idempotent(self):
+        # One streaming SELECT, then per chunk: ledger INSERT, balance upsert + UPDATE, outbox INSERT,
+        # inside the bulk grant's transaction and the per-chunk savepoint.
+        with self.assertNumQueries(25):
+            self.assertEqual(grant_periodic_credits(batch_size=2), 5)
+
+        for subscription in self.subscriptions:
+            self.assertEqual(get_featured_credit_balance(subscription), 3)
+        self.assertEqual(grant_periodic_credits(batch_size=2), 0)
+        self.assertEqual(SubscriptionCreditLedger.objects.filter(reason="monthly_grant").count(), 5)
+
+    def test_backfilled_legacy_grants_are_not_granted_again(self):
+        backfill = import_module("subscriptions.migrations.0013_backfill_credit_grant_period")
+        first, second = self.subscriptions[:2]
+        for subscription in (first, second, second):
+            SubscriptionCreditLedger.objects.create(
+                user_id=subscription.user_id,
+                subscription=subscription,
+                credit_type="featured",
+                change=3,
+                reason="monthly_grant",
+            )
+
+        backfill.backfill_grant_period(apps, None)
+
+        periods = SubscriptionCreditLedger.objects.filter(subscription=second).values_list("grant_period", flat=True)
+        self.assertCountEqual(periods, [timezone.localdate().isoformat(), None])
+        self.assertEqual(grant_periodic_credits(), 3)
+
+    def test_grant_key_is_unique_per_period(self):
+        grant_periodic_credits()
+        entry = SubscriptionCreditLedger.objects.filter(reason="monthly_grant").first()
+
+        with self.assertRaises(IntegrityError):
+            SubscriptionCreditLedger.objects.create(
+                user_id=entry.user_id,
+                subscription_id=entry.subscription_id,
+                credit_type=entry.credit_type,
+                change=entry.change,
+                reason=entry.reason,
+                grant_period=entry.grant_period,
+            )
+
+    def test_command_dry_run_writes_nothing(self):
+        out = StringIO()
+
+        call_command("grant_monthly_credits", "--dry-run", stdout=out)
+
+        self.assertIn("Would grant credits to 5 subscription(s).", out.getvalue())
+        self.assertFalse(SubscriptionCreditLedger.objects.exists())
+        call_command("grant_monthly_credits", "--batch-size", "2", stdout=out)
+        self.assertEqual(SubscriptionCreditLedger.objects.count(), 5)
+
+    def test_bulk_grant_writes_chunks_in_one_transaction(self):
+        free = SubscriptionPlan.objects.create(
+            key="free", name="Free", description="", price_ttd=Decimal("0.00"), billing_period="monthly"
+        )
+        UserSubscription.objects.filter(pk=self.subscriptions[0].pk).update(plan=free)
+        subscriptions = UserSubscription.objects.filter(pk__in=[subscription.pk for subscription in self.subscriptions])
+
+        # SELECT, transaction, then per chunk: ledger INSERT, balance upsert + UPDATE, outbox INSERT.
+        with self.assertNumQueries(11):
+            created = grant_featured_credits_bulk(
+                subscriptions, reason="admin_grant", order_reference="ADMIN-1", batch_size=2
+            )
+
+        self.assertEqual(created, 4)
+        self.assertEqual(get_featured_credit_balance(self.subscriptions[0]), 0)
+        for subscription in self.subscriptions[1:]:
+            self.assertEqual(get_featured_credit_balance(subscription), 3)
+        entry = SubscriptionCreditLedger.objects.filter(reason="admin_grant").first()
+        self.assertEqual((entry.change, entry.related_order_reference, entry.grant_period), (3, "ADMIN-1", None))
+
+    def test_bulk_grant_accepts_instances_and_repeats(self):
+        subscription = self.subscriptions[0]
+
+        self.assertEqual(grant_featured_credits_bulk([subscription, subscription], reason="admin_grant"), 2)
+
+        self.assertEqual(get_featured_credit_balance(subscription), 6)
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from subscriptions import catalog
+from subscriptions.models import (
+    ProcessedSubscriptionOrder,
+    SubscriptionInboxMessage,
+    SubscriptionPlan,
+    SubscriptionProduct,
+    UserSubscription,
+)
+from subscriptions.services import claim_inbox_messages, process_subscription_inbox
+from subscriptions.signals import on_order_paid
+
+
+class DummyOrder:
+    def __init__(self, reference, user, items):
+        self.reference = reference
+        self.user = user
+        self.items = items
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+@override_settings(SUBSCRIPTIONS_ORDER_INBOX=True, SUBSCRIPTIONS_INBOX_RETRY_BACKOFF=30)
+class OrderInboxTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            featured_credits_per_period=1,
+        )
+        self.product = SubscriptionProduct.objects.create(sku="BUS_SUB_MONTH_PLUS", plan=self.plan, period_days=30)
+
+    def _pay(self, reference, *skus):
+        on_order_paid(None, order=DummyOrder(reference, self.user, [DummyItem(sku) for sku in skus]))
+
+    def test_receiver_only_writes_an_inbox_row(self):
+        catalog.get_catalog()
+        with self.assertNumQueries(1):
+            self._pay("ORDER-1", "TSHIRT", self.product.sku)
+        self._pay("ORDER-1", self.product.sku)
+        self._pay("ORDER-2", "TSHIRT")
+
+        message = SubscriptionInboxMessage.objects.get()
+        self.assertEqual((message.order_reference, message.skus), ("ORDER-1", [self.product.sku]))
+        self.assertFalse(UserSubscription.objects.exists())
+
+    def test_worker_activates_and_marks_done(self):
+        self._pay("ORDER-1", self.product.sku)
+
+        self.assertEqual(process_subscription_inbox(), (1, 0))
+
+        message = SubscriptionInboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), (SubscriptionInboxMessage.Status.DONE, 1))
+        self.assertTrue(UserSubscription.objects.filter(user=self.user, plan=self.plan).exists())
+        self.assertTrue(ProcessedSubscriptionOrder.objects.filter(order_reference="ORDER-1").exists())
+        self.assertEqual(process_subscription_inbox(), (0, 0))
+
+    def test_failures_back_off_then_give_up(self):
+        self._pay("ORDER-1", self.product.sku)
+        target = "subscriptions.services.activate_or_renew_subscription_from_order_item"
+
+        with override_settings(SUBSCRIPTIONS_INBOX_MAX_ATTEMPTS=2), mock.patch(target, side_effect=RuntimeError("locked")):
+            self.assertEqual(process_subscription_inbox(), (0, 1))
+            message = SubscriptionInboxMessage.objects.get()
+            self.assertEqual(message.status, SubscriptionInboxMessage.Status.PENDING)
+            self.assertIn("RuntimeError: locked", message.last_error)
+            self.assertGreater(message.available_at, timezone.now() + timedelta(seconds=25))
+            self.assertEqual(process_subscription_inbox(), (0, 0))
+
+            self.assertEqual(process_subscription_inbox(now=timezone.now() + timedelta(minutes=1)), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual((message.status, message.attempts), (SubscriptionInboxMessage.Status.FAILED, 2))
+
+    def test_expired_lease_can_be_reclaimed(self):
+        self._pay("ORDER-1", self.product.sku)
+
+        self.assertEqual(len(claim_inbox_messages()), 1)
+        self.assertEqual(claim_inbox_messages(), [])
+        later = timezone.now() + timedelta(minutes=10)
+        self.assertEqual(process_subscription_inbox(now=later), (1, 0))
+
+    def test_command_drains_the_inbox(self):
+        self._pay("ORDER-1", self.product.sku)
+        out = StringIO()
+
+        call_command("process_subscription_inbox", "--batch-size", "10", stdout=out)
+
+        self.assertIn("Processed 1 message(s); 0 attempt(s) failed.", out.getvalue())
+        self.assertTrue(UserSubscription.objects.filter(user=self.user).exists())
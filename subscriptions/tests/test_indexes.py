@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from subscriptions.models import (
+    SubscriptionCreditBalance,
+    SubscriptionCreditLedger,
+    SubscriptionStatus,
+    UserSubscription,
+)
+from subscriptions.selectors import _active_subscriptions, due_subscriptions
+
+
+class HotQueryIndexTests(TestCase):
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("EXPLAIN assertions are written against SQLite's query planner.")
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.now = timezone.now()
+
+    def assertUsesIndex(self, queryset, table):
+        plan = queryset.explain()
+        self.assertNotRegex(plan, rf"SCAN {table}\b(?! USING)", plan)
+        self.assertRegex(plan, rf"SEARCH {table} USING (COVERING )?INDEX", plan)
+
+    def test_active_subscription_lookups_use_index(self):
+        self.assertUsesIndex(_active_subscriptions(self.user, self.now), "subscriptions_usersubscription")
+        self.assertUsesIndex(
+            UserSubscription.objects.filter(
+                user_id__in=[self.user.pk], status=SubscriptionStatus.ACTIVE, current_period_end__gt=self.now
+            ),
+            "subscriptions_usersubscription",
+        )
+
+    def test_expiry_scan_uses_index(self):
+        self.assertUsesIndex(due_subscriptions(self.now), "subscriptions_usersubscription")
+
+    def test_period_start_scan_uses_index(self):
+        self.assertUsesIndex(
+            UserSubscription.objects.filter(
+                status=SubscriptionStatus.ACTIVE,
+                current_period_start__gte=self.now,
+                current_period_start__lt=self.now + timedelta(days=1),
+            ),
+            "subscriptions_usersubscription",
+        )
+
+    def test_ledger_total_is_index_only(self):
+        totals = (
+            SubscriptionCreditLedger.objects.filter(subscription_id=self.user.pk, credit_type="featured")
+            .values("subscription_id")
+            .annotate(total=Sum("change"))
+            .order_by()
+        )
+        self.assertRegex(totals.explain(), "USING COVERING INDEX ledger_sub_type_change_idx")
+
+    def test_balance_lookup_uses_index(self):
+        self.assertUsesIndex(
+            SubscriptionCreditBalance.objects.filter(subscription_id=self.user.pk, credit_type="featured"),
+            "subscriptions_subscriptioncreditbalance",
+        )
@@ -0,0 +1,142 @@
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from subscriptions import metering
+from subscriptions.metering import check_usage_quota, flush_usage, get_usage, record_usage
+from subscriptions.models import SubscriptionPlan, SubscriptionProduct, SubscriptionUsageRollup
+from subscriptions.services import activate_or_renew_subscription_from_order_item
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class UsageMeteringTests(TestCase):
+    def setUp(self):
+        metering._buffer.clear()
+        self.addCleanup(metering._buffer.clear)
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            usage_quotas={"bumps": 3},
+        )
+        self.product = SubscriptionProduct.objects.create(sku="BUS_SUB_MONTH_PLUS", plan=self.plan, period_days=30)
+        activate_or_renew_subscription_from_order_item(
+            DummyOrder(reference="ORDER-METER", user=self.user), None, DummyItem(sku=self.product.sku), self.user
+        )
+
+    def _rollups(self):
+        return {
+            (row.metric, row.granularity, row.period_start): row.count
+            for row in SubscriptionUsageRollup.objects.filter(user=self.user)
+        }
+
+    def test_recording_is_buffered_and_flushed_in_bulk(self):
+        june_1 = datetime(2026, 6, 1, 12, tzinfo=dt_timezone.utc)
+        june_2 = datetime(2026, 6, 2, 12, tzinfo=dt_timezone.utc)
+        with self.assertNumQueries(0):
+            for _ in range(50):
+                record_usage(self.user, "listing_views", at=june_1)
+            record_usage(self.user, "listing_views", 5, at=june_2)
+
+        # Savepoint, one INSERT for all day and month buckets, one UPDATE per (period, amount) group.
+        with self.assertNumQueries(6):
+            self.assertEqual(flush_usage(), 2)
+        record_usage(self.user.pk, "listing_views", at=june_2)
+        flush_usage()
+
+        self.assertEqual(
+            self._rollups(),
+            {
+                ("listing_views", "day", date(2026, 6, 1)): 50,
+                ("listing_views", "day", date(2026, 6, 2)): 6,
+                ("listing_views", "month", date(2026, 6, 1)): 56,
+            },
+        )
+        self.assertEqual(get_usage(self.user, "listing_views", at=june_2), 56)
+
+    @override_settings(SUBSCRIPTIONS_USAGE_BUFFER_SIZE=2)
+    def test_buffer_flushes_after_commit_once_full(self):
+        other = get_user_model().objects.create_user(username="other", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            record_usage(self.user, "bumps")
+            record_usage(other, "bumps")
+            record_usage(other, "bumps")
+
+        self.assertEqual(SubscriptionUsageRollup.objects.filter(granularity="month").count(), 2)
+
+    @override_settings(SUBSCRIPTIONS_USAGE_BUFFER_SIZE=2)
+    def test_rolled_back_flush_does_not_stop_later_flushes(self):
+        other = get_user_model().objects.create_user(username="other", password="pass")
+        record_usage(self.user, "bumps")
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            record_usage(other, "bumps")
+            raise DatabaseError("rolled back")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(5):
+                record_usage(other, "listing_views")
+
+        self.assertEqual(SubscriptionUsageRollup.objects.filter(granularity="month").count(), 3)
+        self.assertEqual(metering._buffer.pending(other.pk, "bumps", timezone.localdate().replace(day=1)), 0)
+
+    def test_pending_usage_is_flushed_at_exit(self):
+        record_usage(self.user, "bumps", 2)
+
+        metering._flush_at_exit()
+
+        self.assertEqual(SubscriptionUsageRollup.objects.get(granularity="month").count, 2)
+
+    def test_buffer_flushes_once_old_enough(self):
+        record_usage(self.user, "bumps")
+        later = metering._buffer.clock() + 11
+        with mock.patch.object(metering._buffer, "clock", return_value=later):
+            with self.captureOnCommitCallbacks(execute=True):
+                record_usage(self.user, "bumps")
+
+        self.assertEqual(get_usage(self.user, "bumps"), 2)
+        self.assertEqual(metering._buffer.pending(self.user.pk, "bumps", timezone.localdate().replace(day=1)), 0)
+
+    def test_quota_check_counts_unflushed_usage(self):
+        record_usage(self.user, "bumps", 2)
+        flush_usage()
+        self.assertTrue(check_usage_quota(self.user, "bumps"))
+
+        record_usage(self.user, "bumps")
+        self.assertFalse(check_usage_quota(self.user, "bumps"))
+        self.assertTrue(check_usage_quota(self.user, "contact_reveals"))
+
+    def test_failed_flush_keeps_usage_buffered(self):
+        record_usage(self.user, "bumps", 2)
+
+        with mock.patch.object(metering, "_write_rollups", side_effect=DatabaseError("down")):
+            with self.assertRaises(DatabaseError):
+                flush_usage()
+        self.assertEqual(get_usage(self.user, "bumps"), 2)
+        flush_usage()
+        self.assertEqual(get_usage(self.user, "bumps"), 2)
+        self.assertEqual(SubscriptionUsageRollup.objects.get(granularity="month").count, 2)
+
+    @override_settings(SUBSCRIPTIONS_ENABLE_USAGE=False)
+    def test_disabled_usage_records_nothing(self):
+        record_usage(self.user, "bumps", 10)
+
+        self.assertEqual(flush_usage(), 0)
+        self.assertTrue(check_usage_quota(self.user, "bumps"))
@@ -0,0 +1,128 @@
+import inspect
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from subscriptions import entitlements, metrics, services
+from subscriptions.entitlements import aget_entitlements, consume_featured_credit, get_entitlements
+from subscriptions.models import SubscriptionPlan, SubscriptionProduct
+from subscriptions.services import activate_or_renew_subscription_from_order_item
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+@override_settings(SUBSCRIPTIONS_METRICS_BACKEND="subscriptions.metrics.InMemoryBackend")
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.backend = metrics.get_backend()
+        self.backend.reset()
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            featured_credits_per_period=1,
+        )
+        self.other_plan = SubscriptionPlan.objects.create(
+            key="dealer_pro",
+            name="Dealer Pro",
+            description="",
+            price_ttd=Decimal("499.00"),
+            billing_period="monthly",
+        )
+        SubscriptionProduct.objects.create(sku="BUS_SUB_MONTH_PLUS", plan=self.plan, period_days=30)
+        SubscriptionProduct.objects.create(sku="BUS_SUB_MONTH_PRO", plan=self.other_plan, period_days=30)
+
+    def _activate(self, reference, sku="BUS_SUB_MONTH_PLUS"):
+        return activate_or_renew_subscription_from_order_item(
+            DummyOrder(reference=reference, user=self.user), None, DummyItem(sku=sku), self.user
+        )
+
+    def test_activation_outcomes_are_labelled(self):
+        self._activate("ORDER-1")
+        self._activate("ORDER-2")
+        self._activate("ORDER-2")
+        self._activate("ORDER-3", sku="BUS_SUB_MONTH_PRO")
+
+        name = "subscriptions.services.activate_or_renew_subscription_from_order_item.calls"
+        for outcome in ("activated", "renewed", "duplicate", "plan_changed"):
+            self.assertEqual(self.backend.counter(name, outcome=outcome), 1, outcome)
+
+    def test_consumption_outcomes_and_query_counts(self):
+        self._activate("ORDER-1")
+        self.backend.reset()
+
+        self.assertTrue(consume_featured_credit(self.user, reason="test"))
+        self.assertFalse(consume_featured_credit(self.user, reason="test"))
+
+        name = "subscriptions.entitlements.consume_featured_credit"
+        self.assertEqual(self.backend.counter(f"{name}.calls", outcome="consumed"), 1)
+        self.assertEqual(self.backend.counter(f"{name}.calls", outcome="insufficient"), 1)
+        queries = self.backend.samples(f"{name}.queries", outcome="consumed")
+        self.assertEqual(len(queries), 1)
+        self.assertGreater(queries[0], 0)
+        # The nested service call is reported on its own as well.
+        self.assertEqual(
+            self.backend.counter("subscriptions.services.consume_featured_credits.calls", outcome="insufficient"), 1
+        )
+        for outcome in ("consumed", "insufficient"):
+            self.assertEqual(
+                self.backend.counter("subscriptions.services.consume_featured_credit.calls", outcome=outcome), 1
+            )
+
+    async def test_async_calls_are_timed(self):
+        await sync_to_async(self._activate)("ORDER-1")
+        self.backend.reset()
+
+        await aget_entitlements(self.user)
+
+        name = "subscriptions.entitlements.aget_entitlements"
+        self.assertEqual(self.backend.counter(f"{name}.calls", outcome="ok"), 1)
+        self.assertEqual(len(self.backend.samples(f"{name}.duration_ms", outcome="ok")), 1)
+        self.assertGreater(self.backend.samples(f"{name}.queries", outcome="ok")[0], 0)
+
+    def test_errors_are_labelled_and_reraised(self):
+        @metrics.instrument(name="failing")
+        def failing():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            failing()
+        self.assertEqual(self.backend.counter("subscriptions.failing.calls", outcome="error"), 1)
+
+
+class InstrumentationCoverageTests(TestCase):
+    def test_public_functions_are_instrumented(self):
+        for module in (services, entitlements):
+            for name, func in inspect.getmembers(module, inspect.isfunction):
+                if func.__module__ != module.__name__ or name.startswith("_") or inspect.isgeneratorfunction(func):
+                    continue
+                self.assertTrue(hasattr(func, "__wrapped__"), f"{module.__name__}.{name}")
+
+    def test_backends_must_implement_every_method(self):
+        class Partial(metrics.MetricsBackend):
+            def increment(self, name, value=1, tags=None):
+                pass
+
+        with self.assertRaises(TypeError):
+            Partial()
+
+
+class DisabledMetricsTests(TestCase):
+    def test_no_backend_by_default(self):
+        self.assertIsNone(metrics.get_backend())
+        user = get_user_model().objects.create_user(username="viewer", password="pass")
+        self.assertEqual(get_entitlements(user)["featured_credits_balance"], 0)
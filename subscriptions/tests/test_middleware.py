@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from subscriptions.entitlements import (
+    can_post_listing,
+    consume_featured_credit,
+    get_entitlements,
+    has_active_subscription,
+)
+from subscriptions.middleware import SubscriptionMiddleware
+from subscriptions.models import SubscriptionPlan, SubscriptionProduct
+from subscriptions.services import activate_or_renew_subscription_from_order_item
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class SubscriptionMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            featured_credits_per_period=2,
+            badge_label="Dealer",
+        )
+        self.product = SubscriptionProduct.objects.create(
+            sku="BUS_SUB_MONTH_PLUS",
+            plan=self.plan,
+            period_days=30,
+        )
+        activate_or_renew_subscription_from_order_item(
+            DummyOrder(reference="ORDER-MW", user=self.user), None, DummyItem(sku=self.product.sku), self.user
+        )
+        self.factory = RequestFactory()
+
+    def _request(self, user):
+        request = self.factory.get("/")
+        request.user = user
+        return request
+
+    def test_lookups_are_memoized_within_a_request(self):
+        def view(request):
+            with self.assertNumQueries(2):
+                can_post_listing(request.user)
+                get_entitlements(request.user)
+                has_active_subscription(request.user)
+                self.assertEqual(request.subscription.plan_id, self.plan.pk)
+                self.assertEqual(request.entitlements["badge_label"], "Dealer")
+            return HttpResponse()
+
+        SubscriptionMiddleware(view)(self._request(self.user))
+
+    def test_consume_invalidates_memo(self):
+        def view(request):
+            self.assertEqual(request.entitlements["featured_credits_balance"], 2)
+            self.assertTrue(consume_featured_credit(request.user, reason="test"))
+            self.assertEqual(request.entitlements["featured_credits_balance"], 1)
+            self.assertEqual(get_entitlements(request.user)["featured_credits_balance"], 1)
+            return HttpResponse()
+
+        SubscriptionMiddleware(view)(self._request(self.user))
+
+    def test_activation_is_visible_on_the_request(self):
+        other = get_user_model().objects.create_user(username="browser", password="pass")
+
+        def view(request):
+            self.assertFalse(request.subscription)
+            activate_or_renew_subscription_from_order_item(
+                DummyOrder(reference="ORDER-MW-2", user=other), None, DummyItem(sku=self.product.sku), other
+            )
+            self.assertEqual(request.subscription.plan_id, self.plan.pk)
+            self.assertEqual(request.entitlements["badge_label"], "Dealer")
+            return HttpResponse()
+
+        SubscriptionMiddleware(view)(self._request(other))
+
+    def test_anonymous_request_has_no_subscription(self):
+        def view(request):
+            with self.assertNumQueries(0):
+                self.assertFalse(request.subscription)
+                self.assertEqual(request.entitlements["featured_credits_balance"], 0)
+            return HttpResponse()
+
+        SubscriptionMiddleware(view)(self._request(AnonymousUser()))
@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from subscriptions import catalog, idempotency
+from subscriptions.models import (
+    ProcessedSubscriptionOrder,
+    SubscriptionPlan,
+    SubscriptionProduct,
+    SubscriptionStatus,
+    UserSubscription,
+)
+from subscriptions.selectors import get_featured_credit_balance
+from subscriptions.services import process_paid_order
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class ProcessPaidOrderTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="dealer", password="pass")
+        self.basic = SubscriptionPlan.objects.create(
+            key="business_basic",
+            name="Business Basic",
+            description="",
+            price_ttd=Decimal("199.00"),
+            billing_period="monthly",
+            featured_credits_per_period=2,
+        )
+        self.product = SubscriptionProduct.objects.create(
+            sku="BUS_SUB_MONTH_BASIC",
+            plan=self.basic,
+            period_days=30,
+        )
+
+    def test_order_is_processed_once(self):
+        order = DummyOrder(reference="ORDER-BATCH", user=self.user)
+        items = [DummyItem("TSHIRT"), DummyItem("BUS_SUB_MONTH_BASIC"), {"sku": "BUS_SUB_MONTH_BASIC"}]
+
+        results = process_paid_order(order, None, items, self.user)
+
+        self.assertEqual(len(results), 1)
+        subscription = UserSubscription.objects.get(user=self.user, status=SubscriptionStatus.ACTIVE)
+        self.assertEqual(subscription.last_paid_order_reference, "ORDER-BATCH")
+        self.assertEqual(get_featured_credit_balance(subscription), 2)
+        self.assertEqual(ProcessedSubscriptionOrder.objects.count(), 1)
+        self.assertEqual(process_paid_order(order, None, items, self.user), [])
+        self.assertEqual(get_featured_credit_balance(subscription), 2)
+
+    def test_recently_processed_duplicate_skips_database(self):
+        idempotency.clear()
+        self.addCleanup(idempotency.clear)
+        order = DummyOrder(reference="ORDER-RETRY-STORM", user=self.user)
+        items = [DummyItem("BUS_SUB_MONTH_BASIC")]
+        with self.captureOnCommitCallbacks(execute=True):
+            process_paid_order(order, None, items, self.user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(process_paid_order(order, None, items, self.user), [])
+
+    def test_existing_claim_is_treated_as_processed(self):
+        ProcessedSubscriptionOrder.objects.create(order_reference="ORDER-RACE", user=self.user, plan=self.basic)
+        order = DummyOrder(reference="ORDER-RACE", user=self.user)
+
+        self.assertEqual(process_paid_order(order, None, [DummyItem("BUS_SUB_MONTH_BASIC")], self.user), [])
+        self.assertFalse(UserSubscription.objects.filter(user=self.user).exists())
+
+    def test_order_without_subscription_items_skips_database(self):
+        order = DummyOrder(reference="ORDER-OTHER", user=self.user)
+        catalog.get_catalog()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(process_paid_order(order, None, [DummyItem("TSHIRT")], self.user), [])
@@ -0,0 +1,122 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from subscriptions import routers
+from subscriptions.entitlements import (
+    consume_featured_credit,
+    get_active_subscription,
+    get_entitlements,
+    get_entitlements_bulk,
+    has_active_subscription,
+)
+from subscriptions.models import SubscriptionPlan, SubscriptionProduct, SubscriptionStatus, UserSubscription
+from subscriptions.services import activate_or_renew_subscription_from_order_item
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+# The "replica" test database is a separate, empty SQLite database, so a read that
+# reaches it finds no subscription while the same read on the primary does.
+@override_settings(SUBSCRIPTIONS_READ_DATABASE="replica", SUBSCRIPTIONS_PRIMARY_PIN_SECONDS=5)
+class ReadReplicaRoutingTests(TestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        routers.clear_pins()
+        self.addCleanup(routers.clear_pins)
+        User = get_user_model()
+        self.user = User.objects.create_user(username="dealer", password="pass")
+        self.other = User.objects.create_user(username="browser", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            featured_credits_per_period=2,
+        )
+        self.product = SubscriptionProduct.objects.create(sku="BUS_SUB_MONTH_PLUS", plan=self.plan, period_days=30)
+
+    def _subscribe(self, user):
+        now = timezone.now()
+        return UserSubscription.objects.create(
+            user=user,
+            plan=self.plan,
+            status=SubscriptionStatus.ACTIVE,
+            started_at=now,
+            current_period_start=now,
+            current_period_end=now + timedelta(days=30),
+        )
+
+    def test_entitlement_reads_use_the_replica(self):
+        self._subscribe(self.other)
+
+        with self.assertNumQueries(1, using="replica"), self.assertNumQueries(0, using="default"):
+            self.assertFalse(has_active_subscription(self.other))
+        with self.assertNumQueries(1, using="replica"):
+            self.assertEqual(get_entitlements_bulk([self.other.pk]), {self.other.pk: get_entitlements(None)})
+
+    def test_write_pins_the_user_to_the_primary(self):
+        activate_or_renew_subscription_from_order_item(
+            DummyOrder(reference="ORDER-PIN", user=self.user), None, DummyItem(sku=self.product.sku), self.user
+        )
+        self._subscribe(self.other)
+
+        with self.assertNumQueries(0, using="replica"):
+            self.assertEqual(get_entitlements(self.user)["featured_credits_balance"], 2)
+        self.assertFalse(has_active_subscription(self.other))
+
+        expired = routers.time.monotonic() + 6
+        with mock.patch.object(routers.time, "monotonic", return_value=expired):
+            self.assertFalse(has_active_subscription(self.user))
+
+    def test_consumption_reads_from_the_primary(self):
+        activate_or_renew_subscription_from_order_item(
+            DummyOrder(reference="ORDER-CONSUME", user=self.user), None, DummyItem(sku=self.product.sku), self.user
+        )
+        routers.clear_pins()
+
+        with self.assertNumQueries(0, using="replica"):
+            self.assertTrue(consume_featured_credit(self.user))
+
+    def test_objects_read_from_the_replica_are_saved_to_the_primary(self):
+        subscription = self._subscribe(self.user)
+        # Replicate the rows the lookup reads.
+        get_user_model().objects.using("replica").bulk_create([self.user])
+        SubscriptionPlan.objects.using("replica").bulk_create([self.plan])
+        UserSubscription.objects.using("replica").bulk_create([subscription])
+        loaded = get_active_subscription(self.user)
+        self.assertEqual(loaded._state.db, "replica")
+
+        loaded.last_paid_order_reference = "ORDER-SAVED"
+        loaded.user = self.user
+        with self.assertNumQueries(0, using="replica"):
+            loaded.save(update_fields=["last_paid_order_reference", "user"])
+
+        self.assertEqual(UserSubscription.objects.get(pk=subscription.pk).last_paid_order_reference, "ORDER-SAVED")
+        self.assertEqual(
+            UserSubscription.objects.using("replica").get(pk=subscription.pk).last_paid_order_reference, ""
+        )
+
+    @override_settings(SUBSCRIPTIONS_READ_DATABASE=None)
+    def test_routing_is_off_without_a_read_database(self):
+        self._subscribe(self.user)
+
+        with self.assertNumQueries(0, using="replica"):
+            self.assertTrue(has_active_subscription(self.user))
+        with routers.replica_reads([self.user.pk]):
+            self.assertEqual(UserSubscription.objects.all().db, "default")
@@ -0,0 +1,129 @@
+import os
+import signal
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from subscriptions.models import (
+    SubscriptionCreditLedger,
+    SubscriptionPlan,
+    SubscriptionProduct,
+    SubscriptionStatus,
+    UserSubscription,
+)
+from subscriptions.scheduler import EXPIRE, GRANT, SubscriptionScheduler
+from subscriptions.services import activate_or_renew_subscription_from_order_item
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class SubscriptionSchedulerTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            featured_credits_per_period=2,
+        )
+        self.product = SubscriptionProduct.objects.create(sku="BUS_SUB_MONTH_PLUS", plan=self.plan, period_days=30)
+        User = get_user_model()
+        self.ending = self._subscription(User.objects.create_user(username="ending"), end=timedelta(minutes=10))
+        self.later = self._subscription(User.objects.create_user(username="later"), end=timedelta(hours=3))
+        self.starting = self._subscription(
+            User.objects.create_user(username="starting"), start=timedelta(minutes=5), end=timedelta(days=30)
+        )
+
+    def _subscription(self, user, *, end, start=-timedelta(days=1)):
+        return UserSubscription.objects.create(
+            user=user,
+            plan=self.plan,
+            status=SubscriptionStatus.ACTIVE,
+            started_at=self.now - timedelta(days=1),
+            current_period_start=self.now + start,
+            current_period_end=self.now + end,
+        )
+
+    def _scheduler(self, **kwargs):
+        scheduler = SubscriptionScheduler(clock=lambda: self.now, **kwargs)
+        scheduler.start()
+        return scheduler
+
+    def _status(self, subscription):
+        subscription.refresh_from_db()
+        return subscription.status
+
+    def test_boundaries_are_processed_when_due(self):
+        scheduler = self._scheduler(window=timedelta(hours=1), refresh_interval=timedelta(hours=1))
+        self.assertEqual(scheduler.next_wakeup(), self.starting.current_period_start)
+
+        self.assertEqual(scheduler.run_pending(self.now + timedelta(minutes=4)), 0)
+        self.assertEqual(scheduler.run_pending(self.now + timedelta(minutes=6)), 1)
+        self.assertTrue(
+            SubscriptionCreditLedger.objects.filter(subscription=self.starting, reason="monthly_grant").exists()
+        )
+        self.assertEqual(scheduler.next_wakeup(), self.ending.current_period_end)
+
+        self.assertEqual(scheduler.run_pending(self.now + timedelta(minutes=11)), 1)
+        self.assertEqual(self._status(self.ending), SubscriptionStatus.EXPIRED)
+        self.assertEqual(self._status(self.later), SubscriptionStatus.ACTIVE)
+        self.assertEqual(scheduler.stats, {EXPIRE: 1, GRANT: 1})
+
+    def test_window_is_extended_on_refresh(self):
+        scheduler = self._scheduler(window=timedelta(hours=1), refresh_interval=timedelta(minutes=30))
+
+        self.assertEqual(scheduler.run_pending(self.now + timedelta(hours=2, minutes=30)), 2)
+        self.assertEqual(scheduler.next_wakeup(), self.later.current_period_end)
+        self.assertEqual(scheduler.run_pending(self.now + timedelta(hours=3)), 1)
+        self.assertEqual(self._status(self.later), SubscriptionStatus.EXPIRED)
+
+    def test_stale_entries_are_rechecked(self):
+        scheduler = self._scheduler(window=timedelta(hours=1))
+        UserSubscription.objects.filter(pk=self.ending.pk).update(current_period_end=self.now + timedelta(days=30))
+
+        self.assertEqual(scheduler.run_pending(self.now + timedelta(minutes=11)), 1)
+        self.assertEqual(self._status(self.ending), SubscriptionStatus.ACTIVE)
+
+    def test_activations_are_picked_up_from_events(self):
+        scheduler = self._scheduler(window=timedelta(days=40))
+        user = get_user_model().objects.create_user(username="new")
+        subscription = activate_or_renew_subscription_from_order_item(
+            DummyOrder("ORDER-NEW", user), None, DummyItem(self.product.sku), user
+        )
+
+        scheduler.refresh(self.now)
+        scheduler.run_pending(subscription.current_period_end)
+        self.assertEqual(scheduler.stats[EXPIRE], 4)
+        self.assertEqual(self._status(subscription), SubscriptionStatus.EXPIRED)
+
+
+class SchedulerCommandTests(TestCase):
+    def test_stops_on_sigterm(self):
+        timer = threading.Timer(0.2, os.kill, args=(os.getpid(), signal.SIGTERM))
+        timer.start()
+        out = StringIO()
+
+        try:
+            call_command("run_subscription_scheduler", "--max-runtime", "10", stdout=out)
+        finally:
+            timer.cancel()
+
+        self.assertIn("Shutdown requested", out.getvalue())
+        self.assertIn("Scheduler stopped: expired 0 subscription(s), granted credits to 0.", out.getvalue())
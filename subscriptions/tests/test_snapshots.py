@@ -0,0 +1,133 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from subscriptions.entitlements import (
+    consume_featured_credit,
+    get_entitlements,
+    get_entitlements_bulk,
+    has_active_subscription,
+    has_active_subscription_bulk,
+)
+from subscriptions.models import (
+    SubscriptionCreditBalance,
+    SubscriptionPlan,
+    SubscriptionProduct,
+    UserEntitlementSnapshot,
+)
+from subscriptions.services import (
+    activate_or_renew_subscription_from_order_item,
+    expire_due_subscriptions,
+    rebuild_credit_balances,
+    refresh_entitlement_snapshots,
+)
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+@override_settings(SUBSCRIPTIONS_ENTITLEMENT_SNAPSHOTS=True)
+class EntitlementSnapshotTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="dealer", password="pass")
+        self.browser = User.objects.create_user(username="browser", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_plus",
+            name="Dealer Plus",
+            description="",
+            price_ttd=Decimal("299.00"),
+            billing_period="monthly",
+            max_active_listings=25,
+            featured_credits_per_period=3,
+            badge_label="Dealer",
+        )
+        self.product = SubscriptionProduct.objects.create(sku="BUS_SUB_MONTH_PLUS", plan=self.plan, period_days=30)
+        self.subscription = activate_or_renew_subscription_from_order_item(
+            DummyOrder(reference="ORDER-SNAPSHOT", user=self.user), None, DummyItem(sku=self.product.sku), self.user
+        )
+
+    def test_balance_rebuild_refreshes_the_snapshot(self):
+        SubscriptionCreditBalance.objects.filter(subscription=self.subscription).update(balance=99)
+        refresh_entitlement_snapshots([self.user.pk])
+        self.assertEqual(get_entitlements(self.user)["featured_credits_balance"], 99)
+
+        self.assertEqual(len(rebuild_credit_balances()), 1)
+
+        self.assertEqual(get_entitlements(self.user)["featured_credits_balance"], 3)
+
+    def test_activation_writes_the_snapshot_and_reads_are_one_lookup(self):
+        row = UserEntitlementSnapshot.objects.get(pk=self.user.pk)
+        self.assertEqual(
+            (row.subscription_id, row.plan_key, row.featured_credits_balance, row.valid_until),
+            (self.subscription.pk, "dealer_plus", 3, self.subscription.current_period_end),
+        )
+
+        with self.assertNumQueries(1):
+            entitlements = get_entitlements(self.user)
+        self.assertEqual(
+            entitlements,
+            {
+                "max_active_listings": 25,
+                "featured_credits_balance": 3,
+                "badge_label": "Dealer",
+                "priority_support": False,
+            },
+        )
+
+    def test_consumption_and_expiry_keep_the_snapshot_current(self):
+        self.assertTrue(consume_featured_credit(self.user))
+        self.assertEqual(get_entitlements(self.user)["featured_credits_balance"], 2)
+
+        expire_due_subscriptions(now=self.subscription.current_period_end)
+        row = UserEntitlementSnapshot.objects.get(pk=self.user.pk)
+        self.assertEqual((row.subscription_id, row.valid_until), (None, None))
+        self.assertFalse(has_active_subscription(self.user))
+
+    def test_snapshot_is_ignored_past_valid_until(self):
+        UserEntitlementSnapshot.objects.filter(pk=self.user.pk).update(
+            valid_until=timezone.now() - timedelta(seconds=1)
+        )
+
+        with self.assertNumQueries(1):
+            self.assertFalse(has_active_subscription(self.user))
+        self.assertEqual(get_entitlements(self.user)["featured_credits_balance"], 0)
+
+    def test_plan_edits_reach_snapshots(self):
+        self.plan.badge_label = "Gold"
+        self.plan.save()
+
+        self.assertEqual(get_entitlements(self.user)["badge_label"], "Gold")
+
+    def test_bulk_reads_fall_back_for_users_without_a_row(self):
+        self.assertEqual(
+            has_active_subscription_bulk([self.user, self.browser]), {self.user.pk: True, self.browser.pk: False}
+        )
+        entitlements = get_entitlements_bulk([self.user.pk, self.browser.pk])
+        self.assertEqual(entitlements[self.user.pk]["featured_credits_balance"], 3)
+        self.assertIsNone(entitlements[self.browser.pk]["max_active_listings"])
+
+    def test_rebuild_command_restores_rows(self):
+        UserEntitlementSnapshot.objects.all().delete()
+        UserEntitlementSnapshot.objects.create(user=self.browser, plan_key="stale")
+        out = StringIO()
+
+        call_command("rebuild_entitlement_snapshots", "--batch-size", "1", stdout=out)
+
+        self.assertIn("Rebuilt 1 entitlement snapshot(s).", out.getvalue())
+        self.assertEqual(
+            list(UserEntitlementSnapshot.objects.values_list("user_id", "plan_key")), [(self.user.pk, "dealer_plus")]
+        )
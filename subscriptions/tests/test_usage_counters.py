@@ -0,0 +1,108 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from subscriptions import usage
+from subscriptions.entitlements import can_post_listing
+from subscriptions.models import SubscriptionPlan, SubscriptionProduct, SubscriptionUsageCounter
+from subscriptions.services import activate_or_renew_subscription_from_order_item, refresh_entitlement_snapshots
+from subscriptions.usage import ACTIVE_LISTINGS, register_usage_source, release_usage, reserve_usage
+
+
+class DummyOrder:
+    def __init__(self, reference, user):
+        self.reference = reference
+        self.user = user
+
+
+class DummyItem:
+    def __init__(self, sku):
+        self.sku = sku
+
+
+class UsageCounterTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="dealer", password="pass")
+        self.browser = User.objects.create_user(username="browser", password="pass")
+        self.plan = SubscriptionPlan.objects.create(
+            key="dealer_basic",
+            name="Dealer Basic",
+            description="",
+            price_ttd=Decimal("99.00"),
+            billing_period="monthly",
+            max_active_listings=2,
+        )
+        self.product = SubscriptionProduct.objects.create(sku="BUS_SUB_MONTH_BASIC", plan=self.plan, period_days=30)
+        activate_or_renew_subscription_from_order_item(
+            DummyOrder(reference="ORDER-USAGE", user=self.user), None, DummyItem(sku=self.product.sku), self.user
+        )
+        sources = mock.patch.dict(usage._sources, clear=True)
+        sources.start()
+        self.addCleanup(sources.stop)
+
+    def test_reservations_stop_at_the_plan_limit(self):
+        self.assertEqual(can_post_listing(self.user), (True, "within_limit"))
+        self.assertTrue(reserve_usage(self.user))
+        # Subscription lookup, then one conditional UPDATE inside a savepoint.
+        with self.assertNumQueries(4):
+            self.assertTrue(reserve_usage(self.user))
+
+        self.assertFalse(reserve_usage(self.user))
+        self.assertEqual(can_post_listing(self.user), (False, "listing_limit_reached"))
+        self.assertEqual(SubscriptionUsageCounter.objects.get(user=self.user).used, 2)
+
+        release_usage(self.user)
+        self.assertEqual(can_post_listing(self.user), (True, "within_limit"))
+        self.assertTrue(reserve_usage(self.user))
+
+    @override_settings(SUBSCRIPTIONS_ENTITLEMENT_SNAPSHOTS=True)
+    def test_limit_check_is_one_counter_lookup(self):
+        refresh_entitlement_snapshots([self.user.pk])
+        self.assertTrue(reserve_usage(self.user))
+
+        # Snapshot row, then the counter row; no COUNT over listings.
+        with self.assertNumQueries(2):
+            self.assertEqual(can_post_listing(self.user), (True, "within_limit"))
+
+    def test_release_never_goes_negative(self):
+        self.assertTrue(reserve_usage(self.user))
+        release_usage(self.user, amount=5)
+
+        self.assertEqual(SubscriptionUsageCounter.objects.get(user=self.user).used, 0)
+
+    def test_users_without_a_subscription_cannot_reserve(self):
+        self.assertFalse(reserve_usage(self.browser))
+        self.assertFalse(SubscriptionUsageCounter.objects.filter(user=self.browser).exists())
+
+    def test_unlimited_plans_still_count(self):
+        SubscriptionPlan.objects.filter(pk=self.plan.pk).update(max_active_listings=None)
+
+        for _ in range(3):
+            self.assertTrue(reserve_usage(self.user))
+        self.assertEqual(SubscriptionUsageCounter.objects.get(user=self.user).used, 3)
+        self.assertEqual(can_post_listing(self.user), (True, "unlimited"))
+
+    def test_reconcile_command_uses_the_registered_source(self):
+        reserve_usage(self.user)
+        register_usage_source(ACTIVE_LISTINGS, lambda: [(self.user.pk, 2), (self.browser.pk, 1)])
+        out = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("reconcile_usage_counters", "--check", stdout=out)
+        self.assertIn(f"{self.user.pk} [active_listings]: stored=1 source=2", out.getvalue())
+
+        call_command("reconcile_usage_counters", stdout=out)
+        self.assertIn("Reconciled 2 counter(s).", out.getvalue())
+        self.assertEqual(
+            dict(SubscriptionUsageCounter.objects.values_list("user_id", "used")), {self.user.pk: 2, self.browser.pk: 1}
+        )
+        self.assertEqual(can_post_listing(self.user), (False, "listing_limit_reached"))
+
+    def test_reconcile_rejects_unknown_metrics(self):
+        with self.assertRaises(CommandError):
+            call_command("reconcile_usage_counters", "--metric", "active_listings", stdout=StringIO())
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from django.db import transaction as db_transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import memo, routers
+from .metrics import instrument, set_outcome
+from .models import SubscriptionUsageCounter
+from .selectors import get_active_subscription_for_user
+
+ACTIVE_LISTINGS = SubscriptionUsageCounter.Metric.ACTIVE_LISTINGS
+
+# Plan field holding the limit for each counted metric; ``None`` on the plan means unlimited.
+LIMIT_FIELDS = {
+    ACTIVE_LISTINGS: "max_active_listings",
+}
+
+_sources: dict = {}
+
+
+def register_usage_source(metric: str, callback) -> None:
+    """Register how the host app counts ``metric``; used by :func:`reconcile_usage_counters`.
+
+    ``callback()`` returns an iterable of ``(user_id, count)`` pairs, one per user with
+    non-zero usage.
+    """
+    _sources[metric] = callback
+
+
+def _usage_changed(user_id) -> None:
+    memo.invalidate(user_id)
+    routers.pin_to_primary([user_id])
+
+
+def _counters(user, metric: str):
+    return SubscriptionUsageCounter.objects.filter(user=user, metric=metric)
+
+
+@instrument
+def reserve_usage(user, metric: str = ACTIVE_LISTINGS, amount: int = 1) -> bool:
+    """Count ``amount`` more of ``metric`` for ``user`` if their plan's limit allows it.
+
+    The limit check and the increment are one conditional UPDATE, so concurrent
+    reservations can never push the counter past the limit.
+    """
+    with routers.primary_reads():
+        subscription = get_active_subscription_for_user(user, now=timezone.now())
+    if subscription is None:
+        set_outcome("no_active_subscription")
+        return False
+    limit = getattr(subscription.plan, LIMIT_FIELDS[metric])
+
+    counters = _counters(user, metric)
+    if limit is not None:
+        counters = counters.filter(used__lte=limit - amount)
+    with db_transaction.atomic():
+        reserved = bool(counters.update(used=F("used") + amount))
+        if not reserved and not _counters(user, metric).exists():
+            SubscriptionUsageCounter.objects.bulk_create(
+                [SubscriptionUsageCounter(user=user, metric=metric)], ignore_conflicts=True
+            )
+            reserved = bool(counters.update(used=F("used") + amount))
+    _usage_changed(user.pk)
+    set_outcome("reserved" if reserved else "limit_reached")
+    return reserved
+
+
+@instrument
+def release_usage(user, metric: str = ACTIVE_LISTINGS, amount: int = 1) -> None:
+    """Give back ``amount`` of ``metric``; the counter never drops below zero."""
+    _counters(user, metric).update(used=Greatest(F("used") - amount, Value(0)))
+    _usage_changed(user.pk)
+
+
+@instrument
+def reconcile_usage_counters(metric: str | None = None, *, check_only: bool = False) -> list[tuple]:
+    """Compare counters with the registered sources; fix drift unless ``check_only``.
+
+    Returns ``(user_id, metric, stored, expected)`` for every mismatch.
+    """
+    metrics = [metric] if metric else list(_sources)
+    mismatches = []
+    for name in metrics:
+        if name not in _sources:
+            raise LookupError(f"No usage source registered for {name!r}.")
+        expected = {user_id: count for user_id, count in _sources[name]()}
+        with db_transaction.atomic():
+            stored = dict(
+                SubscriptionUsageCounter.objects.select_for_update()
+                .filter(metric=name)
+                .values_list("user_id", "used")
+            )
+            found = [
+                (user_id, name, stored.get(user_id), expected.get(user_id, 0))
+                for user_id in expected.keys() | stored.keys()
+                if expected.get(user_id, 0) != stored.get(user_id, 0)
+            ]
+            mismatches.extend(found)
+            if check_only:
+                continue
+
+            by_count = {}
+            for user_id, _, current, count in found:
+                if current is not None:
+                    by_count.setdefault(count, []).append(user_id)
+            for count, user_ids in by_count.items():
+                SubscriptionUsageCounter.objects.filter(metric=name, user_id__in=user_ids).update(used=count)
+            SubscriptionUsageCounter.objects.bulk_create(
+                [
+                    SubscriptionUsageCounter(user_id=user_id, metric=name, used=count)
+                    for user_id, _, current, count in found
+                    if current is None
+                ],
+                ignore_conflicts=True,
+            )
+        for user_id, *_ in found:
+            memo.invalidate(user_id)
+    return mismatches